@@ -2,64 +2,189 @@ import os
 import databases
 import sqlalchemy
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import create_engine, inspect
 from dotenv import load_dotenv
-from datetime import date, datetime, timedelta, timezone
-from fastapi import FastAPI, Depends, HTTPException, status, Form, Query, Request, File, UploadFile
+from datetime import date, datetime, time, timedelta, timezone
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, status, Form, Query, Request, Response, File, UploadFile
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from pydantic import BaseModel, EmailStr, Field
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import jwt
+from jwt import InvalidTokenError as JWTError
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
 from typing import Optional, List, Dict, Any
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import traceback
 from passlib.context import CryptContext
 import uuid
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 import httpx
+import aiohttp
+import redis.asyncio as redis
 import asyncio
-import json
+import random
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+from cachetools import TTLCache
 from sqlalchemy.dialects import postgresql
 import pytz
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 import base64
 import hashlib
+import secrets
 from typing import Tuple
-import time
 import ssl
 import re
-from bs4 import BeautifulSoup
+import lxml.html
 
 # --- Environment variables ---
 load_dotenv()
 
 # --- Weather Cache ---
-# Simple in-memory cache with TTL (time-to-live) expiration
-weather_cache = {}
+# Bounded in-memory caches with TTL expiration; least recently used entries are evicted when full.
+# Forecasts change hourly, historic data effectively never does. Keys are plain tuples of
+# (temperature_unit, latitude, longitude, start_date, end_date) with coordinates rounded to ~11m.
+forecast_weather_cache = TTLCache(maxsize=10_000, ttl=3600)
+historic_weather_cache = TTLCache(maxsize=50_000, ttl=86400)
 
-def get_cache_key(latitude: float, longitude: float, start_date: str, end_date: str, endpoint_type: str) -> str:
-    """Generate a unique cache key for weather data."""
-    key_string = f"{endpoint_type}:{latitude}:{longitude}:{start_date}:{end_date}"
-    return hashlib.md5(key_string.encode()).hexdigest()
+def get_weather_cache(endpoint_type: str) -> TTLCache:
+    """Return the cache for an endpoint type ("forecast" or "historic")."""
+    return forecast_weather_cache if endpoint_type == "forecast" else historic_weather_cache
 
-def get_cached_weather(cache_key: str) -> Optional[Dict]:
+def get_cached_weather(cache_key: tuple, endpoint_type: str) -> Optional[Dict]:
     """Get cached weather data if it exists and hasn't expired."""
-    if cache_key in weather_cache:
-        cached_data, timestamp = weather_cache[cache_key]
-        # Cache expires after 1 hour for forecast, 24 hours for historic
-        cache_ttl = 3600 if "forecast" in cache_key else 86400
-        if time.time() - timestamp < cache_ttl:
-            return cached_data
-        else:
-            # Remove expired cache entry
-            del weather_cache[cache_key]
-    return None
+    return get_weather_cache(endpoint_type).get(cache_key)
+
+def cache_weather_data(cache_key: tuple, endpoint_type: str, data: Dict):
+    """Cache weather data until the endpoint type's TTL expires."""
+    get_weather_cache(endpoint_type)[cache_key] = data
+
+# Shared Open-Meteo session; keeps connections alive across requests instead of a handshake per call.
+# aiohttp rather than httpx here: these are plain JSON GETs fanned out under load, where it's faster.
+weather_http_session: Optional[aiohttp.ClientSession] = None
+
+def get_weather_http_session() -> aiohttp.ClientSession:
+    """Return the shared session for the weather API, creating it on first use (inside the event loop)"""
+    global weather_http_session
+    if weather_http_session is None:
+        weather_http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=30, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+    return weather_http_session
+
+WEATHER_API_URLS = {
+    "forecast": "https://api.open-meteo.com/v1/forecast",
+    "historic": "https://archive-api.open-meteo.com/v1/archive",
+}
+WEATHER_DAILY_FIELDS = ("temperature_2m_max", "precipitation_probability_mean", "cloudcover_mean")
+
+# Shared Redis copy of individual days, so overlapping ranges (e.g. paging through months) only
+# fetch the days nobody has asked for yet (one request per contiguous gap). Forecast days are refreshed hourly; past days don't change.
+WEATHER_DAY_REDIS_TTL_SECONDS = {"forecast": 3600, "historic": 30 * 86400}
+WEATHER_MAX_CACHED_DAYS = 366
+
+def weather_day_key(endpoint_type: str, temperature_unit: str, latitude: float, longitude: float, day: str) -> str:
+    return f"wx:{endpoint_type}:{temperature_unit}:{latitude}:{longitude}:{day}"
+
+def weather_days(start_date: str, end_date: str) -> Optional[List[str]]:
+    """ISO dates from start_date to end_date inclusive, or None if the range can't be cached per day"""
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except ValueError:
+        return None  # Let Open-Meteo reject it with its own error
+    if not 0 <= (end - start).days < WEATHER_MAX_CACHED_DAYS:
+        return None
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+async def request_open_meteo(endpoint_type: str, params: Dict) -> Dict:
+    async with get_weather_http_session().get(WEATHER_API_URLS[endpoint_type], params=params) as response:
+        response.raise_for_status()
+        return await response.json(loads=orjson.loads)
+
+def missing_weather_spans(days: List[str], by_day: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(first, last) of each contiguous run of days with no cached entry"""
+    spans = []
+    run_start = None
+    for i, day in enumerate(days):
+        if by_day[day] is None:
+            if run_start is None:
+                run_start = day
+            if i + 1 == len(days) or by_day[days[i + 1]] is not None:
+                spans.append((run_start, day))
+                run_start = None
+    return spans
+
+async def load_weather(cache_key: tuple, endpoint_type: str, params: Dict) -> Dict:
+    """Assemble the range from per-day Redis entries, fetching only the gaps of missing days from Open-Meteo"""
+    temperature_unit, latitude, longitude, start_date, end_date = cache_key
+    days = weather_days(start_date, end_date)
+    if days is None or redis_client is None:
+        return await request_open_meteo(endpoint_type, params)
+
+    keys = [weather_day_key(endpoint_type, temperature_unit, latitude, longitude, day) for day in days]
+    by_day = dict(zip(days, await redis_mget_json(keys)))
+    spans = missing_weather_spans(days, by_day)
+    if spans:
+        # One request per contiguous gap, so days already cached between gaps aren't downloaded again
+        responses = await asyncio.gather(*(
+            request_open_meteo(endpoint_type, params | {"start_date": first, "end_date": last})
+            for first, last in spans
+        ))
+        new_days = {}
+        for response in responses:
+            fetched = response["daily"]
+            for i, day in enumerate(fetched["time"]):
+                new_days[day] = {field: fetched[field][i] for field in WEATHER_DAILY_FIELDS}
+        by_day.update(new_days)
+        # Open-Meteo returns all-null days it has no data for yet (archive lag, forecast horizon);
+        # only days with real values go to Redis, so those are fetched again on the next miss
+        await redis_mset_json(
+            {
+                weather_day_key(endpoint_type, temperature_unit, latitude, longitude, day): values
+                for day, values in new_days.items()
+                if any(value is not None for value in values.values())
+            },
+            WEATHER_DAY_REDIS_TTL_SECONDS[endpoint_type]
+        )
+
+    return {"daily": {"time": days} | {
+        field: [by_day[day][field] if by_day.get(day) else None for day in days] for field in WEATHER_DAILY_FIELDS
+    }}
+
+# Outbound weather requests currently in flight, so concurrent misses on one key share a single call
+weather_inflight: Dict[tuple, asyncio.Future] = {}
+
+async def fetch_weather_once(cache_key: tuple, endpoint_type: str, params: Dict) -> Dict:
+    """Fetch and cache weather data for a cache miss; concurrent callers for the same key await the first one's result."""
+    inflight_key = (endpoint_type, *cache_key)
+    pending = weather_inflight.get(inflight_key)
+    if pending is not None:
+        # shield: a follower disconnecting must not cancel the shared request
+        return await asyncio.shield(pending)
 
-def cache_weather_data(cache_key: str, data: Dict):
-    """Cache weather data with timestamp."""
-    weather_cache[cache_key] = (data, time.time())
+    pending = asyncio.get_running_loop().create_future()
+    weather_inflight[inflight_key] = pending
+    try:
+        weather_data = await load_weather(cache_key, endpoint_type, params)
+        cache_weather_data(cache_key, endpoint_type, weather_data)
+        pending.set_result(weather_data)
+        return weather_data
+    except asyncio.CancelledError:
+        pending.cancel()
+        raise
+    except Exception as e:
+        pending.set_exception(e)
+        pending.exception()  # mark retrieved so a miss without followers doesn't log "never retrieved"
+        raise
+    finally:
+        weather_inflight.pop(inflight_key, None)
 
 # --- Logging ---
 log_directory = "logs"
@@ -69,12 +194,14 @@ if not os.path.exists(log_directory):
 log_file_path = os.path.join(log_directory, "backend.log")
 
 # Configure logging with EST timezone
-import pytz
+from zoneinfo import ZoneInfo
+
+# Resolved once; converter runs for every log record
+EST_TZ = ZoneInfo('US/Eastern')
 
 class ESTFormatter(logging.Formatter):
     def converter(self, timestamp):
-        dt = datetime.fromtimestamp(timestamp, tz=pytz.timezone('US/Eastern'))
-        return dt.timetuple()
+        return datetime.fromtimestamp(timestamp, tz=EST_TZ).timetuple()
 
 est_formatter = ESTFormatter('%(asctime)s EST - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s')
 
@@ -94,9 +221,11 @@ file_handler.setFormatter(est_formatter)
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(est_formatter)
 
-# Add handlers to logger
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# File and console writes happen on the listener thread; request handlers only enqueue records
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+logger.addHandler(QueueHandler(log_queue))
 
 # Prevent duplicate logs
 logger.propagate = False
@@ -106,6 +235,9 @@ SECRET_KEY = os.getenv("SECRET_KEY", "a_random_secret_key_for_development")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30 # 30 days
 SNS_PLATFORM_APPLICATION_ARN = os.getenv("SNS_PLATFORM_APPLICATION_ARN")
+AWS_REGION = os.getenv("AWS_REGION")
+S3_BUCKET = os.getenv("AWS_S3_BUCKET_NAME")
+S3_URL_PREFIX = f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/"
 
 
 # --- AWS SNS Client Setup ---
@@ -119,6 +251,180 @@ if SNS_PLATFORM_APPLICATION_ARN:
 else:
     logger.warning("SNS_PLATFORM_APPLICATION_ARN not set. Push notifications will be disabled.")
 
+# boto3 has no asyncio API, so SNS publishes run on their own small pool rather than the
+# loop's default executor, which also serves DNS lookups and other blocking work
+sns_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sns-publish")
+
+
+async def run_sns(func, *args, **kwargs):
+    """Run a blocking SNS client call on the dedicated SNS thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(sns_executor, partial(func, *args, **kwargs))
+
+
+# --- AWS S3 Client Setup ---
+s3_client = None
+if S3_BUCKET and AWS_REGION:
+    try:
+        s3_client = boto3.client(
+            's3',
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            region_name=AWS_REGION,
+            config=BotoConfig(max_pool_connections=50, retries={'max_attempts': 3, 'mode': 'adaptive'})
+        )
+        logger.info("AWS S3 client initialized successfully.")
+    except Exception as e:
+        logger.error(f"Failed to initialize AWS S3 client: {e}", exc_info=True)
+else:
+    logger.warning("AWS_S3_BUCKET_NAME or AWS_REGION not set. Profile photo uploads will be disabled.")
+
+# Same for S3: a slow upload ties up a thread for its whole duration, so uploads get their own pool
+s3_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="s3-upload")
+
+
+async def run_s3(func, *args, **kwargs):
+    """Run a blocking S3 client call on the dedicated S3 thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(s3_executor, partial(func, *args, **kwargs))
+
+# Profile photos larger than this are rejected before being handed to S3
+MAX_PROFILE_PHOTO_BYTES = 10_000_000
+# Leading bytes of the image formats accepted for profile photos -> (content type, extension)
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", ("image/jpeg", ".jpg")),
+    (b"\x89PNG\r\n\x1a\n", ("image/png", ".png")),
+    (b"GIF87a", ("image/gif", ".gif")),
+    (b"GIF89a", ("image/gif", ".gif")),
+]
+
+def sniff_image_type(header: bytes) -> Optional[tuple]:
+    """Return (content_type, extension) for a recognised image header, or None"""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ("image/webp", ".webp")
+    if header[4:8] == b"ftyp" and header[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return ("image/heic", ".heic")
+    for signature, image_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    return None
+
+# Small avatars go up in a single PutObject; larger files switch to 8 MiB multipart parts
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True
+)
+
+
+# --- Redis Cache Setup ---
+# Optional shared cache across workers and restarts; every caller falls back to local state without it
+REDIS_HOST = os.getenv("REDIS_HOST")
+redis_client = None
+if REDIS_HOST:
+    try:
+        redis_client = redis.Redis(
+            host=REDIS_HOST,
+            port=int(os.getenv("REDIS_PORT", "6379")),
+            password=os.getenv("REDIS_PASSWORD"),
+            db=int(os.getenv("REDIS_DB", "0")),
+            socket_timeout=5,
+            max_connections=20
+        )
+        logger.info("Redis client initialized successfully.")
+    except Exception as e:
+        logger.error(f"Failed to initialize Redis client: {e}", exc_info=True)
+else:
+    logger.warning("REDIS_HOST not set. Shared Redis caching will be disabled.")
+
+
+async def redis_get_json(key: str) -> Optional[Any]:
+    """Return the decoded JSON value stored at key, or None if missing or Redis is unavailable"""
+    if redis_client is None:
+        return None
+    try:
+        raw = await redis_client.get(key)
+        return orjson.loads(raw) if raw is not None else None
+    except Exception as e:
+        logger.warning("Redis GET failed for %s: %s", key, e)
+        return None
+
+
+async def redis_set_json(key: str, value: Any, ttl_seconds: int):
+    """Store value at key as JSON with a server-side TTL; failures are logged and ignored"""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.set(key, orjson.dumps(value), ex=ttl_seconds)
+    except Exception as e:
+        logger.warning("Redis SET failed for %s: %s", key, e)
+
+
+async def redis_mget_json(keys: List[str]) -> List[Optional[Any]]:
+    """Return the decoded JSON values for keys in one round trip; None for missing keys or if Redis is unavailable"""
+    if redis_client is None or not keys:
+        return [None] * len(keys)
+    try:
+        return [orjson.loads(raw) if raw is not None else None for raw in await redis_client.mget(keys)]
+    except Exception as e:
+        logger.warning("Redis MGET failed for %d keys: %s", len(keys), e)
+        return [None] * len(keys)
+
+
+async def redis_mset_json(values: Dict[str, Any], ttl_seconds: int):
+    """Store several JSON values with a shared TTL in one pipelined round trip; failures are logged and ignored"""
+    if redis_client is None or not values:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, orjson.dumps(value), ex=ttl_seconds)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning("Redis pipelined SET failed for %d keys: %s", len(values), e)
+
+
+# Family-scoped responses that are read far more often than they change. Entries are fresh for the
+# TTL, then kept for the stale window so a failing database can still be answered from them.
+FAMILY_CACHE_TTL_SECONDS = 60
+FAMILY_CACHE_STALE_SECONDS = 3600
+FAMILY_CACHE_KINDS = ("custodians", "emails", "members")
+
+
+def family_cache_key(kind: str, family_id) -> str:
+    return f"family:{kind}:{family_id}"
+
+
+async def get_family_cached(kind: str, family_id, load):
+    """Return the cached body for kind if fresh, else await load() and cache it; falls back to a stale copy if load() fails"""
+    key = family_cache_key(kind, family_id)
+    entry = await redis_get_json(key)
+    now = datetime.now(timezone.utc).timestamp()
+    if entry is not None and now - entry["generated_at"] < FAMILY_CACHE_TTL_SECONDS:
+        return entry["body"]
+
+    try:
+        body = await load()
+    except HTTPException:
+        raise
+    except Exception as e:
+        if entry is None:
+            raise
+        logger.warning("Serving stale %s for family %s: %s", kind, family_id, e)
+        return entry["body"]
+
+    await redis_set_json(key, {"generated_at": now, "body": body}, FAMILY_CACHE_TTL_SECONDS + FAMILY_CACHE_STALE_SECONDS)
+    return body
+
+
+async def invalidate_family_cache(family_id):
+    """Drop every cached family response after a change to the family's members"""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.delete(*(family_cache_key(kind, family_id) for kind in FAMILY_CACHE_KINDS))
+    except Exception as e:
+        logger.warning("Redis DEL failed for family %s: %s", family_id, e)
+
 
 # --- Database ---
 DB_USER = os.getenv("DB_USER")
@@ -128,9 +434,25 @@ DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME")
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-database = databases.Database(DATABASE_URL)
+# Set when DB_HOST/DB_PORT point at PgBouncer in transaction pooling mode, which can hand each
+# transaction a different server connection, so named prepared statements can't be cached
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+# databases hands these options straight to asyncpg.create_pool:
+# - a bounded, pre-sized pool instead of the library defaults
+# - connections recycled after max_queries / idle lifetime so server-side memory doesn't creep
+# - asyncpg keeps prepared statements per connection keyed by SQL text; a larger cache lets every
+#   prebuilt statement below stay prepared instead of being re-parsed by the server (disabled behind PgBouncer)
+# - a per-query timeout so a stuck statement can't hold a pool connection indefinitely
+database = databases.Database(
+    DATABASE_URL,
+    min_size=int(os.getenv("DB_POOL_MIN_SIZE", "5")),
+    max_size=int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+    max_queries=50_000,
+    max_inactive_connection_lifetime=300,
+    statement_cache_size=0 if DB_PGBOUNCER else 1024,
+    command_timeout=float(os.getenv("DB_COMMAND_TIMEOUT", "60"))
+)
 metadata = sqlalchemy.MetaData()
-engine = create_engine(DATABASE_URL.replace("+asyncpg", ""))
 
 # --- Table Definitions ---
 users = sqlalchemy.Table(
@@ -170,8 +492,16 @@ events = sqlalchemy.Table(
     sqlalchemy.Column("content", sqlalchemy.String(255), nullable=True),
     sqlalchemy.Column("position", sqlalchemy.Integer, nullable=True),
     sqlalchemy.Column("event_type", sqlalchemy.String, default='regular', nullable=False),
+    sqlalchemy.Index(
+        "events_family_date_nocustody_idx", "family_id", "date",
+        postgresql_where=sqlalchemy.text("event_type <> 'custody'")
+    ),
 )
 
+# Rendered as a SQL literal rather than a bind parameter so that generic (prepared) plans
+# can still match the partial events_family_date_nocustody_idx index
+non_custody_event = events.c.event_type != sqlalchemy.literal_column("'custody'")
+
 custody = sqlalchemy.Table(
     "custody",
     metadata,
@@ -184,6 +514,7 @@ custody = sqlalchemy.Table(
     sqlalchemy.Column("handoff_time", sqlalchemy.Time, nullable=True),
     sqlalchemy.Column("handoff_location", sqlalchemy.String(255), nullable=True),
     sqlalchemy.Column("created_at", sqlalchemy.DateTime, nullable=True, default=datetime.now),
+    sqlalchemy.Index("custody_family_date_uq", "family_id", "date", unique=True),
 )
 
 notification_emails = sqlalchemy.Table(
@@ -245,6 +576,7 @@ group_chats = sqlalchemy.Table(
     sqlalchemy.Column("group_identifier", sqlalchemy.String(255), unique=True, nullable=True),
     sqlalchemy.Column("created_by_user_id", UUID(as_uuid=True), sqlalchemy.ForeignKey("users.id"), nullable=False),
     sqlalchemy.Column("created_at", sqlalchemy.DateTime, nullable=True, default=datetime.now),
+    sqlalchemy.UniqueConstraint("family_id", "contact_type", "contact_id", name="unique_group_chat_contact"),
 )
 
 children = sqlalchemy.Table(
@@ -300,6 +632,164 @@ daycare_providers = sqlalchemy.Table(
     sqlalchemy.Column("updated_at", sqlalchemy.DateTime, nullable=True, default=datetime.now, onupdate=datetime.now),
 )
 
+# --- Hot-Path Queries ---
+@lru_cache(maxsize=512)
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First day of the month and first day of the following month"""
+    return date(year, month, 1), date(year + month // 12, month % 12 + 1, 1)
+
+# The hottest lookups skip SQLAlchemy entirely: plain SQL sent straight to the asyncpg connection,
+# so there is no per-request expression compilation, and the fixed SQL text stays prepared in
+# asyncpg's per-connection statement cache.
+async def fetch_all_raw(sql: str, *args):
+    async with database.connection() as connection:
+        return await connection.raw_connection.fetch(sql, *args)
+
+async def fetch_one_raw(sql: str, *args):
+    async with database.connection() as connection:
+        return await connection.raw_connection.fetchrow(sql, *args)
+
+async def execute_raw(sql: str, *args):
+    async with database.connection() as connection:
+        return await connection.raw_connection.execute(sql, *args)
+
+async def iterate_raw(sql: str, *args):
+    # asyncpg cursors only exist inside a transaction
+    async with database.connection() as connection:
+        async with connection.raw_connection.transaction():
+            async for row in connection.raw_connection.cursor(sql, *args):
+                yield row
+
+# Non-custody events for a month view, over the half-open range [first of month, first of next month)
+EVENTS_MONTH_SQL = """
+    SELECT id, family_id, date, content, position
+    FROM events
+    WHERE family_id = $1 AND date >= $2 AND date < $3 AND event_type <> 'custody'
+"""
+
+# One keyset page of non-custody events in a date range: $4 is the last id already sent (0 for
+# the first page); a NULL $5 means LIMIT ALL. Pages ask for one row more than they send, so the
+# extra row says whether another page follows without a second query.
+EVENTS_RANGE_PAGE_SQL = """
+    SELECT id, family_id, date, content, position
+    FROM events
+    WHERE family_id = $1 AND date BETWEEN $2 AND $3 AND event_type <> 'custody' AND id > $4
+    ORDER BY id
+    LIMIT $5
+"""
+
+# Custody rows with the custodian's first name joined in; custodians outside the family get NULL
+CUSTODY_MONTH_SQL = """
+    SELECT c.id, c.date, c.custodian_id, c.handoff_day, c.handoff_time, c.handoff_location,
+           u.first_name AS custodian_name
+    FROM custody c
+    LEFT JOIN users u ON u.id = c.custodian_id AND u.family_id = c.family_id
+    WHERE c.family_id = $1 AND c.date >= $2 AND c.date < $3
+    ORDER BY c.date
+"""
+
+# Flip handoff_day on a day's custody row and read it back with the custodian's name, in one statement
+HANDOFF_DAY_UPDATE_SQL = """
+    WITH updated AS (
+        UPDATE custody SET handoff_day = $3
+        WHERE family_id = $1 AND date = $2
+        RETURNING id, custodian_id, handoff_time, handoff_location
+    )
+    SELECT updated.*, u.first_name AS custodian_name
+    FROM updated
+    LEFT JOIN users u ON u.id = updated.custodian_id
+"""
+
+# Profile plus the selected theme (user_preferences.user_id is unique), in one round trip
+USER_PROFILE_SQL = """
+    SELECT u.id, u.first_name, u.last_name, u.email, u.phone_number, u.subscription_type,
+           u.subscription_status, u.profile_photo_url, u.status, u.last_signed_in, u.created_at,
+           p.selected_theme
+    FROM users u
+    LEFT JOIN user_preferences p ON p.user_id = u.id
+    WHERE u.id = $1
+"""
+
+# Push endpoint registration from the device-token endpoint
+SET_SNS_ENDPOINT_SQL = "UPDATE users SET sns_endpoint_arn = $2 WHERE id = $1"
+
+# created_at is passed in to match the table's Python-side default
+ADD_NOTIFICATION_EMAIL_SQL = "INSERT INTO notification_emails (family_id, email, created_at) VALUES ($1, $2, $3) RETURNING id"
+
+# Credentials for the login form
+LOGIN_USER_SQL = "SELECT id, family_id, password_hash FROM users WHERE email = $1"
+
+# Current-user lookup behind every authenticated request that misses the auth cache; the whole
+# row is cached, so handlers can read any column from it
+USER_BY_ID_SQL = "SELECT * FROM users WHERE id = $1"
+
+# All members of a family, for the family member listing
+FAMILY_USERS_SQL = """
+    SELECT id, first_name, last_name, email, phone_number, status, last_signed_in,
+           last_known_location, last_known_location_timestamp
+    FROM users WHERE family_id = $1
+"""
+
+# Current hash for password changes; read fresh because cached auth rows can lag another worker's change
+USER_PASSWORD_HASH_SQL = "SELECT password_hash FROM users WHERE id = $1"
+
+# Join-or-create a family by name in one statement. Default "<last name> Family" families share
+# names, so families.name can't be unique; callers serialize on FAMILY_NAME_LOCK_SQL instead.
+FAMILY_NAME_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext($1))"
+FAMILY_GET_OR_CREATE_SQL = """
+    WITH existing AS (
+        SELECT id FROM families WHERE name = $1 LIMIT 1
+    ), created AS (
+        INSERT INTO families (id, name) SELECT $2, $1 WHERE NOT EXISTS (SELECT 1 FROM existing)
+        RETURNING id
+    )
+    SELECT id, false AS created FROM existing
+    UNION ALL
+    SELECT id, true AS created FROM created
+"""
+
+# Everything set_custody needs to know before writing, in one round trip: the existing row for
+# the date (if any), the previous day's custodian, and the new custodian's name
+SET_CUSTODY_CONTEXT_STMT = sqlalchemy.select(
+    sqlalchemy.select(custody.c.id).where(
+        (custody.c.family_id == sqlalchemy.bindparam("family_id")) &
+        (custody.c.date == sqlalchemy.bindparam("date"))
+    ).limit(1).scalar_subquery().label("existing_id"),
+    sqlalchemy.select(custody.c.custodian_id).where(
+        (custody.c.family_id == sqlalchemy.bindparam("family_id")) &
+        (custody.c.date == sqlalchemy.bindparam("previous_date"))
+    ).limit(1).scalar_subquery().label("previous_custodian_id"),
+    sqlalchemy.select(users.c.first_name).where(
+        users.c.id == sqlalchemy.bindparam("custodian_id")
+    ).scalar_subquery().label("custodian_name")
+)
+
+# Push recipients for a custody change (family members other than the sender with an SNS endpoint),
+# each row carrying the sender's name and the day's custodian name, in one round trip. The names
+# come from a one-row subquery that outer-joins the custody row and custodian, so a day without a
+# custody record still yields the sender. $1 = family_id, $2 = sender_id, $3 = event date.
+CUSTODY_CHANGE_RECIPIENTS_SQL = """
+    SELECT r.sns_endpoint_arn, names.sender_name, names.custodian_name
+    FROM users r
+    LEFT JOIN (
+        SELECT s.first_name AS sender_name, cu.first_name AS custodian_name
+        FROM users s
+        LEFT JOIN custody c ON c.family_id = $1 AND c.date = $3
+        LEFT JOIN users cu ON cu.id = c.custodian_id
+        WHERE s.id = $2
+    ) names ON true
+    WHERE r.family_id = $1 AND r.id != $2 AND r.sns_endpoint_arn IS NOT NULL
+"""
+
+def babysitter_in_family(family_id):
+    """Ownership check for babysitters, which belong to families through babysitter_families; folded
+    into WHERE clauses so no separate "is it mine?" SELECT is needed. Built per call with the family
+    as a literal value, since Update statements don't support .params() in SQLAlchemy 2.0."""
+    return sqlalchemy.exists().where(
+        (babysitter_families.c.babysitter_id == babysitters.c.id) &
+        (babysitter_families.c.family_id == family_id)
+    )
+
 
 # --- Pydantic Models ---
 class User(BaseModel):
@@ -387,57 +877,26 @@ class FamilyMember(BaseModel):
     last_known_location: Optional[str] = None
     last_known_location_timestamp: Optional[str] = None
 
-class Babysitter(BaseModel):
-    id: Optional[int] = None
+class ContactBase(BaseModel):
+    """Fields shared by babysitters and emergency contacts"""
     first_name: str
     last_name: str
     phone_number: str
-    rate: Optional[float] = None
     notes: Optional[str] = None
-    created_by_user_id: Optional[str] = None
-    created_at: Optional[str] = None
 
-class BabysitterCreate(BaseModel):
-    first_name: str
-    last_name: str
-    phone_number: str
+class BabysitterCreate(ContactBase):
     rate: Optional[float] = None
-    notes: Optional[str] = None
 
-class BabysitterResponse(BaseModel):
+class BabysitterResponse(BabysitterCreate):
     id: int
-    first_name: str
-    last_name: str
-    phone_number: str
-    rate: Optional[float] = None
-    notes: Optional[str] = None
     created_by_user_id: str
     created_at: str
 
-class EmergencyContact(BaseModel):
-    id: Optional[int] = None
-    first_name: str
-    last_name: str
-    phone_number: str
+class EmergencyContactCreate(ContactBase):
     relationship: Optional[str] = None
-    notes: Optional[str] = None
-    created_by_user_id: Optional[str] = None
-    created_at: Optional[str] = None
 
-class EmergencyContactCreate(BaseModel):
-    first_name: str
-    last_name: str
-    phone_number: str
-    relationship: Optional[str] = None
-    notes: Optional[str] = None
-
-class EmergencyContactResponse(BaseModel):
+class EmergencyContactResponse(EmergencyContactCreate):
     id: int
-    first_name: str
-    last_name: str
-    phone_number: str
-    relationship: Optional[str] = None
-    notes: Optional[str] = None
     created_by_user_id: str
     created_at: str
 
@@ -546,7 +1005,7 @@ class DaycareSearchResult(BaseModel):
 # Legacy Event model for compatibility
 class LegacyEvent(BaseModel):
     id: Optional[int] = None
-    event_date: str
+    event_date: date
     content: str
     position: int
 
@@ -561,19 +1020,36 @@ class DailyWeather(BaseModel):
 class WeatherAPIResponse(BaseModel):
     daily: DailyWeather
 
+# List responses are encoded in one pydantic-core call instead of FastAPI's per-item serialization
+CUSTODY_LIST_ADAPTER = TypeAdapter(List[CustodyResponse])
+BABYSITTER_LIST_ADAPTER = TypeAdapter(List[BabysitterResponse])
+EMERGENCY_CONTACT_LIST_ADAPTER = TypeAdapter(List[EmergencyContactResponse])
+
 # --- FastAPI Lifespan ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await database.connect()
     yield
+    if weather_http_session is not None:
+        await weather_http_session.close()
+    if school_http_client is not None:
+        await school_http_client.aclose()
+    if redis_client is not None:
+        await redis_client.aclose()
+    sns_executor.shutdown(wait=False)
+    s3_executor.shutdown(wait=False)
+    password_executor.shutdown(wait=False)
     await database.disconnect()
+    # Flushes whatever is still queued
+    log_listener.stop()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 @app.middleware("http")
 async def add_no_cache_headers(request: Request, call_next):
     response = await call_next(request)
-    if request.url.path.startswith("/api/"):
+    # Endpoints that set their own Cache-Control (e.g. ETag-validated ones) keep it
+    if request.url.path.startswith("/api/") and "cache-control" not in response.headers:
         response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
         response.headers["Pragma"] = "no-cache"
         response.headers["Expires"] = "0"
@@ -581,14 +1057,31 @@ async def add_no_cache_headers(request: Request, call_next):
 
 # --- CORS ---
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+# Compress JSON list responses for mobile clients; tiny payloads are not worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # --- Security ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+# bcrypt is deliberately slow (~250ms per call); run it on a CPU-sized pool so it doesn't stall the event loop
+password_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="password-hash")
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(password_executor, pwd_context.hash, password)
+
+# Decode settings built once; sub and exp are enforced by the library in the same pass as the signature check
+JWT_DECODE_KWARGS = {
+    "algorithms": [ALGORITHM],
+    "options": {"require": ["sub", "exp"], "verify_aud": False}
+}
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -597,45 +1090,98 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 def uuid_to_string(uuid_obj) -> str:
-    """Convert UUID to standardized lowercase string format for consistent comparisons"""
-    return str(uuid_obj).lower()
+    """Convert UUID to standardized string format (uuid.UUID.__str__ is already lowercase)"""
+    return str(uuid_obj)
+
+def event_to_frontend(event) -> Dict[str, Any]:
+    """Convert an events row to the format expected by the frontend and iOS app (UUID/date left for orjson)"""
+    return {
+        'id': event['id'],
+        'family_id': event['family_id'],
+        'event_date': event['date'],
+        'content': event['content'],
+        'position': event['position']
+    }
+
+def json_list_response(adapter: TypeAdapter, items: list, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Encode a list of response models straight to JSON bytes with its TypeAdapter"""
+    return Response(content=adapter.dump_json(items), media_type="application/json", headers=headers)
+
+def etag_json_response(request: Request, content: Any, max_age: int = 30) -> Response:
+    """JSON response with a weak ETag and short private caching; a matching If-None-Match gets an empty 304"""
+    body = orjson.dumps(content)
+    # Weak validator: GZipMiddleware may re-encode the body, but the content is equivalent
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def stream_json_array(items, headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """Stream an async iterable of JSON-serializable items as a JSON array, encoding one item per chunk"""
+    async def generate():
+        separator = b"["
+        async for item in items:
+            yield separator + orjson.dumps(item)
+            separator = b","
+        yield b"]" if separator == b"," else b"[]"
+    return StreamingResponse(generate(), media_type="application/json", headers=headers)
+
+# Verified token -> user row, so repeat requests with the same token skip the JWT decode and user
+# lookup. The short TTL bounds how long a changed or deleted user can still be served from here.
+AUTH_CACHE_TTL_SECONDS = 60
+auth_cache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL_SECONDS)
+
+def evict_cached_user(user_id):
+    """Drop this worker's cached auth entries for a user whose row just changed"""
+    for token_key, user in list(auth_cache.items()):
+        if user['id'] == user_id:
+            auth_cache.pop(token_key, None)
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    """Resolve the bearer token to the caller's full users row; handlers can read any column from it"""
+    token_key = hashlib.sha256(token.encode()).digest()[:16]
+    cached_user = auth_cache.get(token_key)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+        payload = jwt.decode(token, SECRET_KEY, **JWT_DECODE_KWARGS)
+        user_id = uuid.UUID(payload["sub"])
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    query = users.select().where(users.c.id == user_id)
-    user = await database.fetch_one(query)
+    user = await fetch_one_raw(USER_BY_ID_SQL, user_id)
     
     if user is None:
         raise credentials_exception
+
+    # Only successful verifications are cached, and only if the token outlives the cache entry
+    expires_at = payload.get("exp")
+    if expires_at is None or expires_at - datetime.now(timezone.utc).timestamp() > AUTH_CACHE_TTL_SECONDS:
+        auth_cache[token_key] = user
     return user
 
 @app.post("/api/auth/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    query = users.select().where(users.c.email == form_data.username)
-    user = await database.fetch_one(query)
-    if not user or not verify_password(form_data.password, user["password_hash"]):
+    user = await fetch_one_raw(LOGIN_USER_SQL, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Update last_signed_in timestamp
+    # Update last_signed_in timestamp (shown in the cached family member list)
     await database.execute(
         users.update().where(users.c.id == user['id']).values(last_signed_in=datetime.now())
     )
+    await invalidate_family_cache(user['family_id'])
     
     access_token = create_access_token(
         data={"sub": uuid_to_string(user["id"]), "family_id": uuid_to_string(user["family_id"])}
@@ -661,50 +1207,51 @@ async def register_user(registration_data: UserRegistration):
             )
         
         # Hash the password
-        password_hash = pwd_context.hash(registration_data.password)
-        
-        # Handle family creation/assignment
-        family_id = None
-        if registration_data.family_name:
-            # Check if family already exists
-            family_query = families.select().where(families.c.name == registration_data.family_name)
-            existing_family = await database.fetch_one(family_query)
-            
-            if existing_family:
-                family_id = existing_family['id']
-                logger.info(f"Adding user to existing family: {registration_data.family_name}")
+        password_hash = await hash_password_async(registration_data.password)
+        
+        # The family and the user are created together, or not at all
+        async with database.transaction():
+            if registration_data.family_name:
+                # Join the family if it exists, otherwise create it; the lock keeps two concurrent
+                # registrations with the same family name from creating it twice
+                await fetch_one_raw(FAMILY_NAME_LOCK_SQL, registration_data.family_name)
+                family = await fetch_one_raw(FAMILY_GET_OR_CREATE_SQL, registration_data.family_name, uuid.uuid4())
+                family_id = family['id']
+                if family['created']:
+                    logger.info(f"Created new family: {registration_data.family_name} with ID: {family_id}")
+                else:
+                    logger.info(f"Adding user to existing family: {registration_data.family_name}")
             else:
-                # Create new family
+                # Create family with user's last name if no family name provided
+                default_family_name = f"{registration_data.last_name} Family"
                 family_id = uuid.uuid4()
-                family_insert = families.insert().values(id=family_id, name=registration_data.family_name)
+                family_insert = families.insert().values(id=family_id, name=default_family_name)
                 await database.execute(family_insert)
-                logger.info(f"Created new family: {registration_data.family_name} with ID: {family_id}")
-        else:
-            # Create family with user's last name if no family name provided
-            default_family_name = f"{registration_data.last_name} Family"
-            family_id = uuid.uuid4()
-            family_insert = families.insert().values(id=family_id, name=default_family_name)
-            await database.execute(family_insert)
-            logger.info(f"Created default family: {default_family_name} with ID: {family_id}")
-        
-        # Generate UUID for the user
-        user_id = uuid.uuid4()
-        
-        # Create the user
-        user_insert = users.insert().values(
-            id=user_id,
-            family_id=family_id,
-            first_name=registration_data.first_name,
-            last_name=registration_data.last_name,
-            email=registration_data.email,
-            password_hash=password_hash,
-            phone_number=registration_data.phone_number,
-            subscription_type="Free",
-            subscription_status="Active"
-        )
-        
-        await database.execute(user_insert)
+                logger.info(f"Created default family: {default_family_name} with ID: {family_id}")
+            
+            # Generate UUID for the user
+            user_id = uuid.uuid4()
+            
+            # Create the user; a concurrent registration with the same email loses on the unique index
+            user_insert = postgresql.insert(users).values(
+                id=user_id,
+                family_id=family_id,
+                first_name=registration_data.first_name,
+                last_name=registration_data.last_name,
+                email=registration_data.email,
+                password_hash=password_hash,
+                phone_number=registration_data.phone_number,
+                subscription_type="Free",
+                subscription_status="Active"
+            ).on_conflict_do_nothing(index_elements=[users.c.email]).returning(users.c.id)
+            
+            if await database.fetch_one(user_insert) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="User with this email already exists"
+                )
         logger.info(f"Created user with ID: {user_id}")
+        await invalidate_family_cache(family_id)
         
         # Create access token for the new user
         access_token = create_access_token(
@@ -722,7 +1269,8 @@ async def register_user(registration_data: UserRegistration):
         raise
     except Exception as e:
         logger.error(f"Error during user registration: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed. Please try again."
@@ -735,34 +1283,18 @@ async def get_custody_records(year: int, month: int, current_user = Depends(get_
     """
     try:
         family_id = current_user['family_id']
-        # Calculate start and end dates for the month
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year, 1, 1) + timedelta(days=31)
-            end_date = end_date.replace(day=1) - timedelta(days=1)
-        else:
-            end_date = date(year, month + 1, 1) - timedelta(days=1)
-        
-        # Query custody records for the given month and family
-        query = custody.select().where(
-            (custody.c.family_id == family_id) &
-            (custody.c.date.between(start_date, end_date))
-        )
-        
-        db_records = await database.fetch_all(query)
+        month_start, next_month_start = month_bounds(year, month)
         
-        # Get all user data for the family in a single query
-        user_query = users.select().where(users.c.family_id == family_id)
-        family_users = await database.fetch_all(user_query)
-        user_map = {uuid_to_string(user['id']): user['first_name'] for user in family_users}
+        # Query custody records (with custodian names) for the given month and family
+        db_records = await fetch_all_raw(CUSTODY_MONTH_SQL, family_id, month_start, next_month_start)
         
-        # Convert records to CustodyResponse format
+        # Convert records to CustodyResponse format; the row types already match, so skip re-validation
         custody_responses = [
-            CustodyResponse(
+            CustodyResponse.model_construct(
                 id=record['id'],
                 event_date=str(record['date']),
-                content=user_map.get(uuid_to_string(record['custodian_id']), "Unknown"),
-                custodian_id=uuid_to_string(record['custodian_id']),
+                content=record['custodian_name'] or "Unknown",
+                custodian_id=str(record['custodian_id']),
                 handoff_day=record['handoff_day'],
                 handoff_time=record['handoff_time'].strftime('%H:%M') if record['handoff_time'] else None,
                 handoff_location=record['handoff_location']
@@ -770,29 +1302,49 @@ async def get_custody_records(year: int, month: int, current_user = Depends(get_
         ]
         
         # logger.info(f"Returning {len(custody_responses)} custody records for {year}-{month}")
-        return custody_responses
+        return json_list_response(CUSTODY_LIST_ADAPTER, custody_responses)
     except Exception as e:
         logger.error(f"Error fetching custody records: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# Handoff times are H:MM or HH:MM, as strptime('%H:%M') accepted
+HANDOFF_TIME_RE = re.compile(r'(\d{1,2}):(\d{2})')
+
+def parse_handoff_time(value: Optional[str]) -> Optional[time]:
+    """Parse a handoff time string, raising a 400 for anything that isn't a valid H:MM/HH:MM time"""
+    if not value:
+        return None
+    match = HANDOFF_TIME_RE.fullmatch(value)
+    try:
+        if not match:
+            raise ValueError(value)
+        return time(int(match.group(1)), int(match.group(2)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid handoff_time format. Use HH:MM")
+
 @app.post("/api/custody", response_model=CustodyResponse)
-async def set_custody(custody_data: CustodyRecord, current_user = Depends(get_current_user)):
+async def set_custody(custody_data: CustodyRecord, background_tasks: BackgroundTasks, current_user = Depends(get_current_user)):
     """
     Creates or updates a custody record for a specific date.
     """
-    logger.info(f"Received custody update request: {custody_data.model_dump_json(indent=2)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received custody update request: %s", custody_data.model_dump_json(indent=2))
     
     family_id = current_user['family_id']
     actor_id = current_user['id']
     
     try:
-        # Check if a record already exists for this date
-        existing_record_query = custody.select().where(
-            (custody.c.family_id == family_id) &
-            (custody.c.date == custody_data.date)
-        )
-        existing_record = await database.fetch_one(existing_record_query)
+        # Existing record for this date, previous day's custodian and the custodian's name in one query
+        context = await database.fetch_one(SET_CUSTODY_CONTEXT_STMT.params(
+            family_id=family_id,
+            date=custody_data.date,
+            previous_date=custody_data.date - timedelta(days=1),
+            custodian_id=custody_data.custodian_id
+        ))
+        existing_id = context['existing_id']
+        custodian_name = context['custodian_name'] or "Unknown"
         
         # If handoff_day is not provided, determine it based on default logic
         handoff_day_value = custody_data.handoff_day
@@ -801,14 +1353,8 @@ async def set_custody(custody_data: CustodyRecord, current_user = Depends(get_cu
             handoff_day_value = True
         elif handoff_day_value is None:
             # Default logic: check if previous day has different custodian
-            previous_date = custody_data.date - timedelta(days=1)
-            previous_record = await database.fetch_one(
-                custody.select().where(
-                    (custody.c.family_id == family_id) &
-                    (custody.c.date == previous_date)
-                )
-            )
-            if previous_record and previous_record['custodian_id'] != custody_data.custodian_id:
+            previous_custodian_id = context['previous_custodian_id']
+            if previous_custodian_id and previous_custodian_id != custody_data.custodian_id:
                 handoff_day_value = True
                 
                 # Set default handoff time and location if not provided
@@ -818,10 +1364,8 @@ async def set_custody(custody_data: CustodyRecord, current_user = Depends(get_cu
                     if is_weekend:
                         custody_data.handoff_time = "12:00"  # Noon for weekends
                         if not custody_data.handoff_location:
-                            # Get target custodian name for location
-                            target_user = await database.fetch_one(users.select().where(users.c.id == custody_data.custodian_id))
-                            target_name = target_user['first_name'].lower() if target_user else "unknown"
-                            custody_data.handoff_location = f"{target_name}'s home"
+                            # Use target custodian name for location
+                            custody_data.handoff_location = f"{custodian_name.lower()}'s home"
                     else:
                         custody_data.handoff_time = "17:00"  # 5pm for weekdays
                         if not custody_data.handoff_location:
@@ -829,17 +1373,19 @@ async def set_custody(custody_data: CustodyRecord, current_user = Depends(get_cu
             else:
                 handoff_day_value = False
 
-        if existing_record:
+        handoff_time_val = parse_handoff_time(custody_data.handoff_time)
+
+        if existing_id:
             # Update existing record
-            update_query = custody.update().where(custody.c.id == existing_record['id']).values(
+            update_query = custody.update().where(custody.c.id == existing_id).values(
                 custodian_id=custody_data.custodian_id,
                 actor_id=actor_id,
                 handoff_day=handoff_day_value,
-                handoff_time=datetime.strptime(custody_data.handoff_time, '%H:%M').time() if custody_data.handoff_time else None,
+                handoff_time=handoff_time_val,
                 handoff_location=custody_data.handoff_location
             )
             await database.execute(update_query)
-            record_id = existing_record['id']
+            record_id = existing_id
         else:
             # Insert new record
             insert_query = custody.insert().values(
@@ -848,18 +1394,14 @@ async def set_custody(custody_data: CustodyRecord, current_user = Depends(get_cu
                 custodian_id=custody_data.custodian_id,
                 actor_id=actor_id,
                 handoff_day=handoff_day_value,
-                handoff_time=datetime.strptime(custody_data.handoff_time, '%H:%M').time() if custody_data.handoff_time else None,
+                handoff_time=handoff_time_val,
                 handoff_location=custody_data.handoff_location,
                 created_at=datetime.now()
             )
             record_id = await database.execute(insert_query)
             
-        # Send push notification to the other parent
-        await send_custody_change_notification(sender_id=actor_id, family_id=family_id, event_date=custody_data.date)
-            
-        # Get custodian name for response
-        custodian_user = await database.fetch_one(users.select().where(users.c.id == custody_data.custodian_id))
-        custodian_name = custodian_user['first_name'] if custodian_user else "Unknown"
+        # Send push notification to the other parent once the response has gone out
+        background_tasks.add_task(send_custody_change_notification, sender_id=actor_id, family_id=family_id, event_date=custody_data.date)
 
         return CustodyResponse(
             id=record_id,
@@ -870,10 +1412,13 @@ async def set_custody(custody_data: CustodyRecord, current_user = Depends(get_cu
             handoff_time=custody_data.handoff_time,
             handoff_location=custody_data.handoff_location
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error setting custody: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error while setting custody: {e}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Internal server error while setting custody")
 
 @app.patch("/api/custody/handoff-day", response_model=CustodyResponse)
 async def update_handoff_day_only(request: dict, current_user = Depends(get_current_user)):
@@ -895,120 +1440,121 @@ async def update_handoff_day_only(request: dict, current_user = Depends(get_curr
     family_id = current_user['family_id']
     
     try:
-        # Find existing custody record for this date
-        existing_record_query = custody.select().where(
-            (custody.c.family_id == family_id) &
-            (custody.c.date == date_obj)
-        )
-        existing_record = await database.fetch_one(existing_record_query)
+        # Update only the handoff_day field; the row comes back with the custodian's name joined in
+        updated_record = await fetch_one_raw(HANDOFF_DAY_UPDATE_SQL, family_id, date_obj, handoff_day)
         
-        if not existing_record:
+        if not updated_record:
             raise HTTPException(status_code=404, detail="No custody record found for this date")
         
-        # Update only the handoff_day field
-        update_query = custody.update().where(custody.c.id == existing_record['id']).values(
-            handoff_day=handoff_day
-        )
-        await database.execute(update_query)
-        
-        # Get custodian name for response
-        custodian_user = await database.fetch_one(users.select().where(users.c.id == existing_record['custodian_id']))
-        custodian_name = custodian_user['first_name'] if custodian_user else "Unknown"
-        
         # Return the updated record
         return CustodyResponse(
-            id=existing_record['id'],
+            id=updated_record['id'],
             event_date=str(date_obj),
-            content=custodian_name,
-            custodian_id=uuid_to_string(existing_record['custodian_id']),
+            content=updated_record['custodian_name'] or "Unknown",
+            custodian_id=uuid_to_string(updated_record['custodian_id']),
             handoff_day=handoff_day,
-            handoff_time=existing_record['handoff_time'].strftime('%H:%M') if existing_record['handoff_time'] else None,
-            handoff_location=existing_record['handoff_location']
+            handoff_time=updated_record['handoff_time'].strftime('%H:%M') if updated_record['handoff_time'] else None,
+            handoff_location=updated_record['handoff_location']
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating handoff_day: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error while updating handoff_day: {e}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Internal server error while updating handoff_day")
 
 @app.get("/api/family/custodians")
-async def get_family_custodians(current_user = Depends(get_current_user)):
+async def get_family_custodians(request: Request, current_user = Depends(get_current_user)):
     """
     Returns the two primary custodians (parents) for the current user's family.
     """
     family_id = current_user['family_id']
-    family_members = await database.fetch_all(users.select().where(users.c.family_id == family_id).order_by(users.c.created_at))
-    
-    if len(family_members) < 2:
-        raise HTTPException(status_code=404, detail="Family must have at least two members to determine custodians")
+
+    async def load():
+        family_members = await database.fetch_all(
+            sqlalchemy.select(users.c.id, users.c.first_name)
+            .where(users.c.family_id == family_id)
+            .order_by(users.c.created_at)
+            .limit(2)
+        )
         
-    custodian_one = family_members[0]
-    custodian_two = family_members[1]
-    
-    return {
-        "custodian_one": {
-            "id": uuid_to_string(custodian_one['id']),
-            "first_name": custodian_one['first_name']
-        },
-        "custodian_two": {
-            "id": uuid_to_string(custodian_two['id']),
-            "first_name": custodian_two['first_name']
+        if len(family_members) < 2:
+            raise HTTPException(status_code=404, detail="Family must have at least two members to determine custodians")
+            
+        custodian_one = family_members[0]
+        custodian_two = family_members[1]
+        
+        return {
+            "custodian_one": {
+                "id": custodian_one['id'],
+                "first_name": custodian_one['first_name']
+            },
+            "custodian_two": {
+                "id": custodian_two['id'],
+                "first_name": custodian_two['first_name']
+            }
         }
-    }
 
-@app.get("/api/weather/{latitude}/{longitude}", response_model=WeatherAPIResponse)
-async def get_weather(
-    latitude: float, 
-    longitude: float, 
-    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
-    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
-    temperature_unit: Optional[str] = Query("celsius", description="Temperature unit (celsius or fahrenheit)"),
-    current_user = Depends(get_current_user)
+    return etag_json_response(request, await get_family_cached("custodians", family_id, load))
+
+async def get_weather_data(
+    endpoint_type: str,
+    latitude: float,
+    longitude: float,
+    start_date: str,
+    end_date: str,
+    temperature_unit: str
 ):
-    """
-    Fetches weather forecast data.
-    """
-    logger.info(f"Fetching weather for lat={latitude}, lon={longitude} from {start_date} to {end_date}")
-    
+    """Serve forecast or historic weather from the caches, falling back to Open-Meteo."""
+    label = "weather" if endpoint_type == "forecast" else "historic weather"
+    logger.debug("Fetching %s for lat=%s, lon=%s from %s to %s", label, latitude, longitude, start_date, end_date)
+
     # --- Caching ---
-    cache_key = get_cache_key(latitude, longitude, start_date, end_date, f"forecast-{temperature_unit}")
-    cached_data = get_cached_weather(cache_key)
+    cache_key = (temperature_unit, round(latitude, 4), round(longitude, 4), start_date, end_date)
+    cached_data = get_cached_weather(cache_key, endpoint_type)
     if cached_data:
-        logger.info("Returning cached forecast weather data.")
+        logger.debug("Returning cached %s weather data.", endpoint_type)
         return cached_data
 
     # --- API Call ---
-    base_url = "https://api.open-meteo.com/v1/forecast"
     params = {
         "latitude": latitude,
         "longitude": longitude,
         "start_date": start_date,
         "end_date": end_date,
-        "daily": "temperature_2m_max,precipitation_probability_mean,cloudcover_mean",
+        "daily": ",".join(WEATHER_DAILY_FIELDS),
         "timezone": "auto",
         "temperature_unit": temperature_unit
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(base_url, params=params)
-            response.raise_for_status()
-            weather_data = response.json()
-            
-            # Cache the new data
-            cache_weather_data(cache_key, weather_data)
-            
-            return weather_data
-    except httpx.HTTPStatusError as e:
-        logger.error(f"HTTP error fetching weather data: {e.response.status_code} - {e.response.text}", exc_info=True)
-        raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch weather data")
-    except httpx.RequestError as e:
-        logger.error(f"Request error fetching weather data: {e}", exc_info=True)
+        return await fetch_weather_once(cache_key, endpoint_type, params)
+    except aiohttp.ClientResponseError as e:
+        logger.error(f"HTTP error fetching {label} data: {e.status} - {e.message}", exc_info=True)
+        raise HTTPException(status_code=e.status, detail=f"Failed to fetch {label} data")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Request error fetching {label} data: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An error occurred while communicating with the weather service")
     except Exception as e:
-        logger.error(f"An unexpected error occurred while fetching weather data: {e}", exc_info=True)
+        logger.error(f"An unexpected error occurred while fetching {label} data: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
+@app.get("/api/weather/{latitude}/{longitude}", response_model=WeatherAPIResponse)
+async def get_weather(
+    latitude: float, 
+    longitude: float, 
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    temperature_unit: Optional[str] = Query("celsius", description="Temperature unit (celsius or fahrenheit)"),
+    current_user = Depends(get_current_user)
+):
+    """
+    Fetches weather forecast data.
+    """
+    return await get_weather_data("forecast", latitude, longitude, start_date, end_date, temperature_unit)
+
 @app.get("/api/weather/historic/{latitude}/{longitude}", response_model=WeatherAPIResponse)
 async def get_historic_weather(
     latitude: float, 
@@ -1021,63 +1567,21 @@ async def get_historic_weather(
     """
     Fetches historic weather data.
     """
-    logger.info(f"Fetching historic weather for lat={latitude}, lon={longitude} from {start_date} to {end_date}")
-
-    # --- Caching ---
-    cache_key = get_cache_key(latitude, longitude, start_date, end_date, f"historic-{temperature_unit}")
-    cached_data = get_cached_weather(cache_key)
-    if cached_data:
-        logger.info("Returning cached historic weather data.")
-        return cached_data
-
-    # --- API Call ---
-    base_url = "https://archive-api.open-meteo.com/v1/archive"
-    params = {
-        "latitude": latitude,
-        "longitude": longitude,
-        "start_date": start_date,
-        "end_date": end_date,
-        "daily": "temperature_2m_max,precipitation_probability_mean,cloudcover_mean",
-        "timezone": "auto",
-        "temperature_unit": temperature_unit
-    }
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(base_url, params=params)
-            response.raise_for_status()
-            weather_data = response.json()
-
-            # Cache the new data
-            cache_weather_data(cache_key, weather_data)
-
-            return weather_data
-    except httpx.HTTPStatusError as e:
-        logger.error(f"HTTP error fetching historic weather data: {e.response.status_code} - {e.response.text}", exc_info=True)
-        raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch historic weather data")
-    except httpx.RequestError as e:
-        logger.error(f"Request error fetching historic weather data: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="An error occurred while communicating with the weather service")
-    except Exception as e:
-        logger.error(f"An unexpected error occurred while fetching historic weather data: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="An unexpected error occurred")
+    return await get_weather_data("historic", latitude, longitude, start_date, end_date, temperature_unit)
 
 @app.get("/api/user/profile", response_model=UserProfile)
-async def get_user_profile(current_user = Depends(get_current_user)):
+@app.get("/api/users/me", response_model=UserProfile)  # Legacy path, kept for backward compatibility
+async def get_user_profile(request: Request, current_user = Depends(get_current_user)):
     """
     Fetch the current user's profile information.
     """
     try:
-        # Get user data from database
-        user_record = await database.fetch_one(users.select().where(users.c.id == current_user['id']))
+        # Get user data and preferences from database
+        user_record = await fetch_one_raw(USER_PROFILE_SQL, current_user['id'])
         if not user_record:
             raise HTTPException(status_code=404, detail="User not found")
             
-        # Get user preferences
-        prefs_query = user_preferences.select().where(user_preferences.c.user_id == current_user['id'])
-        user_prefs = await database.fetch_one(prefs_query)
-            
-        return UserProfile(
+        return etag_json_response(request, UserProfile(
             id=uuid_to_string(user_record['id']),
             first_name=user_record['first_name'],
             last_name=user_record['last_name'],
@@ -1088,46 +1592,15 @@ async def get_user_profile(current_user = Depends(get_current_user)):
             profile_photo_url=user_record['profile_photo_url'],
             status=user_record['status'] or "active",
             last_signed_in=str(user_record['last_signed_in']) if user_record['last_signed_in'] else None,
-            selected_theme=user_prefs['selected_theme'] if user_prefs else None,
+            selected_theme=user_record['selected_theme'],
             created_at=str(user_record['created_at']) if user_record['created_at'] else None
-        )
+        ).model_dump())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching user profile: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-@app.get("/api/users/me", response_model=UserProfile)
-async def get_user_profile_legacy(current_user = Depends(get_current_user)):
-    """
-    Legacy endpoint for backward compatibility.
-    """
-    try:
-        # Get user data from database
-        user_record = await database.fetch_one(users.select().where(users.c.id == current_user['id']))
-        if not user_record:
-            raise HTTPException(status_code=404, detail="User not found")
-            
-        # Get user preferences
-        prefs_query = user_preferences.select().where(user_preferences.c.user_id == current_user['id'])
-        user_prefs = await database.fetch_one(prefs_query)
-            
-        return UserProfile(
-            id=uuid_to_string(user_record['id']),
-            first_name=user_record['first_name'],
-            last_name=user_record['last_name'],
-            email=user_record['email'],
-            phone_number=user_record['phone_number'],
-            subscription_type=user_record['subscription_type'] or "Free",
-            subscription_status=user_record['subscription_status'] or "Active",
-            profile_photo_url=user_record['profile_photo_url'],
-            status=user_record['status'] or "active",
-            last_signed_in=str(user_record['last_signed_in']) if user_record['last_signed_in'] else None,
-            selected_theme=user_prefs['selected_theme'] if user_prefs else None,
-            created_at=str(user_record['created_at']) if user_record['created_at'] else None
-        )
-    except Exception as e:
-        logger.error(f"Error fetching user profile (legacy): {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.put("/api/users/me/password")
@@ -1135,16 +1608,19 @@ async def update_user_password(password_update: PasswordUpdate, current_user = D
     """
     Updates the password for the current authenticated user.
     """
-    # Verify current password
-    user_record = await database.fetch_one(users.select().where(users.c.id == current_user['id']))
-    if not user_record or not verify_password(password_update.current_password, user_record['password_hash']):
+    # Verify against the stored hash, not the cached auth row: evict_cached_user only clears this worker,
+    # so another worker's cache could still hold the hash from before a recent change
+    user_row = await fetch_one_raw(USER_PASSWORD_HASH_SQL, current_user['id'])
+    if not user_row or not await verify_password_async(password_update.current_password, user_row['password_hash']):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid current password")
     
     # Hash new password and update
-    new_password_hash = pwd_context.hash(password_update.new_password)
+    new_password_hash = await hash_password_async(password_update.new_password)
     await database.execute(
         users.update().where(users.c.id == current_user['id']).values(password_hash=new_password_hash)
     )
+    # The cached row still carries the old hash
+    evict_cached_user(current_user['id'])
     
     return {"status": "success", "message": "Password updated successfully"}
 
@@ -1168,9 +1644,7 @@ async def update_device_token(token: str = Form(...), current_user = Depends(get
             raise HTTPException(status_code=500, detail="Failed to register device for notifications.")
 
         logger.info(f"Successfully created endpoint ARN: {endpoint_arn}")
-        await database.execute(
-            users.update().where(users.c.id == current_user['id']).values(sns_endpoint_arn=endpoint_arn)
-        )
+        await execute_raw(SET_SNS_ENDPOINT_SQL, current_user['id'], endpoint_arn)
         return {"status": "success", "endpoint_arn": endpoint_arn}
 
     except ClientError as e:
@@ -1189,9 +1663,7 @@ async def update_device_token(token: str = Form(...), current_user = Depends(get
                     EndpointArn=endpoint_arn,
                     Attributes={'Token': token, 'Enabled': 'true'}
                 )
-                await database.execute(
-                    users.update().where(users.c.id == current_user['id']).values(sns_endpoint_arn=endpoint_arn)
-                )
+                await execute_raw(SET_SNS_ENDPOINT_SQL, current_user['id'], endpoint_arn)
                 return {"status": "success", "endpoint_arn": endpoint_arn}
             except ClientError as update_e:
                 logger.error(f"Failed to update existing endpoint attributes: {update_e}", exc_info=True)
@@ -1213,6 +1685,7 @@ async def update_last_signin(current_user = Depends(get_current_user)):
         await database.execute(
             users.update().where(users.c.id == current_user['id']).values(last_signed_in=datetime.now())
         )
+        await invalidate_family_cache(current_user['family_id'])
         return {"message": "Last signin time updated successfully"}
     except Exception as e:
         logger.error(f"Error updating last signin time: {e}")
@@ -1220,52 +1693,63 @@ async def update_last_signin(current_user = Depends(get_current_user)):
 
 @app.post("/api/user/profile/photo", response_model=UserProfile)
 async def upload_profile_photo(
+    request: Request,
     photo: UploadFile = File(...),
     current_user = Depends(get_current_user)
 ):
     """
     Uploads a profile photo for the current user.
     """
+    if not s3_client:
+        logger.error("S3 client not configured. Cannot upload profile photo.")
+        raise HTTPException(status_code=500, detail="Photo storage is not configured.")
+
+    # Reject oversized bodies up front, and double-check the spooled size in case the header lied
+    content_length = request.headers.get("content-length")
+    if (content_length and content_length.isdigit() and int(content_length) > MAX_PROFILE_PHOTO_BYTES) or \
+            (photo.size is not None and photo.size > MAX_PROFILE_PHOTO_BYTES):
+        raise HTTPException(status_code=413, detail="Profile photo must be 10 MB or smaller")
+
     try:
-        # Validate file type
-        if not photo.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
+        # Validate file type from the file's magic bytes; the client-supplied Content-Type is not trusted
+        image_type = sniff_image_type(await photo.read(16))
+        await photo.seek(0)
+        if not image_type:
+            raise HTTPException(status_code=400, detail="File must be a JPEG, PNG, GIF, WebP or HEIC image")
+        content_type, file_extension = image_type
         
         # Generate a unique filename
-        file_extension = os.path.splitext(photo.filename)[1]
         unique_filename = f"{uuid.uuid4()}{file_extension}"
         object_name = f"profile_photos/{unique_filename}"
 
-        # Upload to S3
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name=os.getenv("AWS_REGION")
-        )
-
-        # Read file content
-        file_content = await photo.read()
-
-        # Upload to S3
-        s3_client.put_object(
-            Bucket=os.getenv("AWS_S3_BUCKET_NAME"),
-            Key=object_name,
-            Body=file_content,
-            ContentType=photo.content_type,
-            ACL='public-read'  # Make the file publicly accessible
+        # Stream the spooled upload straight to S3; multipart only kicks in above the threshold.
+        # boto3 is blocking, so run it on the S3 pool to keep the event loop free.
+        await run_s3(
+            s3_client.upload_fileobj,
+            photo.file,
+            S3_BUCKET,
+            object_name,
+            ExtraArgs={
+                'ContentType': content_type,
+                'ACL': 'public-read'  # Make the file publicly accessible
+            },
+            Config=S3_TRANSFER_CONFIG
         )
 
         # Construct the S3 URL
-        s3_url = f"https://{os.getenv('AWS_S3_BUCKET_NAME')}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{object_name}"
-
-        # Update user's profile_photo_url in the database
-        await database.execute(
-            users.update().where(users.c.id == current_user['id']).values(profile_photo_url=s3_url)
+        s3_url = S3_URL_PREFIX + object_name
+
+        # Update user's profile_photo_url and read back the row (plus theme) in the same statement
+        selected_theme_query = sqlalchemy.select(user_preferences.c.selected_theme).where(
+            user_preferences.c.user_id == current_user['id']
+        ).scalar_subquery()
+        user_record = await database.fetch_one(
+            users.update()
+            .where(users.c.id == current_user['id'])
+            .values(profile_photo_url=s3_url)
+            .returning(users, selected_theme_query.label("selected_theme"))
         )
-
-        # Re-fetch user to get updated profile_photo_url
-        user_record = await database.fetch_one(users.select().where(users.c.id == current_user['id']))
+        await invalidate_family_cache(current_user['family_id'])
         return UserProfile(
             id=str(user_record['id']),
             first_name=user_record['first_name'],
@@ -1278,13 +1762,16 @@ async def upload_profile_photo(
             selected_theme=user_record['selected_theme'] if user_record['selected_theme'] else None,
             created_at=str(user_record['created_at']) if user_record['created_at'] else None
         )
+    except HTTPException:
+        raise
     except ClientError as e:
         logger.error(f"S3 upload error: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to upload profile photo: {e.response['Error']['Message']}")
+        raise HTTPException(status_code=500, detail="Failed to upload profile photo")
     except Exception as e:
         logger.error(f"Error uploading profile photo: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/api/events/{year}/{month}")
 async def get_events_by_month(year: int, month: int, current_user = Depends(get_current_user)):
@@ -1292,120 +1779,82 @@ async def get_events_by_month(year: int, month: int, current_user = Depends(get_
     Returns non-custody events for the specified month.
     Custody events are now handled by the separate custody API.
     """
-    logger.info(f"Getting events for {year}/{month}")
-    # Calculate start and end dates for the month
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_date = date(year, month + 1, 1) - timedelta(days=1)
-        
-    query = events.select().where(
-        (events.c.family_id == current_user['family_id']) &
-        (events.c.date.between(start_date, end_date)) &
-        (events.c.event_type != 'custody')  # Exclude custody events
-    )
-    db_events = await database.fetch_all(query)
+    logger.debug("Getting events for %s/%s", year, month)
+    month_start, next_month_start = month_bounds(year, month)
+    rows = iterate_raw(EVENTS_MONTH_SQL, current_user['family_id'], month_start, next_month_start)
     
-    # Convert events to the format expected by frontend
-    frontend_events = []
-    try:
-        for event in db_events:
-            event_data = {
-                'id': event['id'],
-                'family_id': str(event['family_id']),
-                'event_date': str(event['date']),
-                'content': event['content'],
-                'position': event['position']
-            }
-            frontend_events.append(event_data)
-    except Exception as e:
-        logger.error(f"Error processing event records for /api/events/{{year}}/{{month}}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Error processing event data")
-        
-    logger.info(f"Payload for /api/events/{{year}}/{{month}}: {json.dumps(frontend_events, indent=2)}")
-    return frontend_events
+    # Iterate the cursor rather than materializing every row, converting events to the
+    # format expected by frontend as they are streamed out
+    return stream_json_array(event_to_frontend(event) async for event in rows)
+
+# Upper bound on a single date-range request: a year plus a few days of overlap on either side
+MAX_EVENT_RANGE_DAYS = 370
 
 @app.get("/api/events")
-async def get_events_by_date_range(start_date: str = None, end_date: str = None, current_user = Depends(get_current_user)):
+async def get_events_by_date_range(
+    start_date: str = None,
+    end_date: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=2000),
+    after: Optional[int] = None,
+    current_user = Depends(get_current_user)
+):
     """
     Returns non-custody events for the specified date range (iOS app compatibility).
     Custody events are now handled by the separate custody API.
     """
-    logger.info(f"iOS app requesting events from {start_date} to {end_date}")
+    logger.debug("iOS app requesting events from %s to %s", start_date, end_date)
     
     if not start_date or not end_date:
         raise HTTPException(status_code=400, detail="start_date and end_date query parameters are required")
     
     try:
-        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        start_date_obj = date.fromisoformat(start_date)
+        end_date_obj = date.fromisoformat(end_date)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if end_date_obj < start_date_obj:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date_obj - start_date_obj).days > MAX_EVENT_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_EVENT_RANGE_DAYS} days")
         
-    query = events.select().where(
-        (events.c.family_id == current_user['family_id']) &
-        (events.c.date.between(start_date_obj, end_date_obj)) &
-        (events.c.event_type != 'custody')  # Exclude custody events
-    )
-    
-    # Log the raw SQL query for debugging
-    compiled_query = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
-    # logger.info(f"Executing event query: {compiled_query}")
-
-    db_events = await database.fetch_all(query)
-    
-    # logger.info(f"Returning {len(db_events)} non-custody events to iOS app")
+    # Keyset pagination on id: each page picks up after the last id of the previous one
+    family_id = current_user['family_id']
+    after_id = after or 0
     
-    # Convert events to the format expected by iOS app
-    frontend_events = []
-    try:
-        for event in db_events:
-            event_data = {
-                'id': event['id'],
-                'family_id': str(event['family_id']),
-                'event_date': str(event['date']),
-                'content': event['content'],
-                'position': event['position']
-            }
-            frontend_events.append(event_data)
-    except Exception as e:
-        logger.error(f"Error processing event records for /api/events: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Error processing event data")
-        
-    # logger.info(f"Payload for /api/events: {json.dumps(frontend_events, indent=2)}")
-    return frontend_events
+    # Paging is opt-in: without a limit the whole range is returned, as current iOS clients expect.
+    # A page is at most 2000 rows, so fetch it whole and take the cursor from the page itself.
+    if limit is not None:
+        rows = await fetch_all_raw(EVENTS_RANGE_PAGE_SQL, family_id, start_date_obj, end_date_obj, after_id, limit + 1)
+        headers = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers = {"X-Next-Cursor": str(rows[-1]['id'])}
+        return ORJSONResponse(content=[event_to_frontend(event) for event in rows], headers=headers)
+
+    # Iterate the cursor rather than materializing every row, converting events to the
+    # format expected by iOS app as they are streamed out
+    rows = iterate_raw(EVENTS_RANGE_PAGE_SQL, family_id, start_date_obj, end_date_obj, after_id, None)
+    return stream_json_array(event_to_frontend(event) async for event in rows)
 
 @app.post("/api/events")
 async def save_event(request: dict, current_user = Depends(get_current_user)):
     """
     Handles non-custody events only. Custody events should use the /api/custody endpoint.
     """
-    logger.info(f"Saving event: {request}")
+    logger.debug("Saving event: %s", request)
     try:
-        logger.info(f"[Line 587] Received non-custody event request: {request}")
-        
         # Check if this is a custody event (position 4) and reject it
         if 'position' in request and request['position'] == 4:
-            logger.error(f"[Line 591] Rejecting custody event - position 4 should use /api/custody endpoint")
+            logger.error("Rejecting custody event - position 4 should use /api/custody endpoint")
             raise HTTPException(status_code=400, detail="Custody events should use /api/custody endpoint")
         
         # Handle legacy event format for non-custody events
         if 'event_date' in request and 'position' in request and 'content' in request:
-            logger.info(f"[Line 596] Processing legacy event format")
             legacy_event = LegacyEvent(**request)
-            logger.info(f"[Line 598] Created LegacyEvent object: {legacy_event}")
-            
-            event_date = datetime.strptime(legacy_event.event_date, '%Y-%m-%d').date()
-            logger.info(f"[Line 601] Parsed event_date: {event_date}")
-            
-            logger.info(f"[Line 603] Creating insert query with values:")
-            logger.info(f"[Line 604]   - family_id: {current_user['family_id']}")
-            logger.info(f"[Line 605]   - date: {event_date}")
-            logger.info(f"[Line 606]   - content: {legacy_event.content}")
-            logger.info(f"[Line 607]   - position: {legacy_event.position}")
-            logger.info(f"[Line 608]   - event_type: 'regular'")
+            event_date = legacy_event.event_date
             
+            logger.debug("Inserting event: family_id=%s date=%s position=%s content=%s",
+                         current_user['family_id'], event_date, legacy_event.position, legacy_event.content)
             insert_query = events.insert().values(
                 family_id=current_user['family_id'],
                 date=event_date,
@@ -1413,74 +1862,65 @@ async def save_event(request: dict, current_user = Depends(get_current_user)):
                 position=legacy_event.position,
                 event_type='regular'
             )
-            logger.info(f"[Line 617] Insert query created successfully")
-            logger.info(f"[Line 618] About to execute database insert...")
-            
             event_id = await database.execute(insert_query)
-            logger.info(f"[Line 621] Successfully executed insert, got event_id: {event_id}")
             
-            logger.info(f"[Line 623] Successfully created event with ID {event_id}: position={legacy_event.position}, content={legacy_event.content}")
+            logger.info(f"Successfully created event with ID {event_id}: position={legacy_event.position}")
             
             return {
                 'id': event_id,  # Return the actual database-generated ID
-                'event_date': legacy_event.event_date,
+                'event_date': event_date.isoformat(),
                 'content': legacy_event.content,
                 'position': legacy_event.position
             }
         else:
-            logger.error(f"[Line 632] Invalid event format - missing required fields")
-            logger.error(f"[Line 633] Request keys: {list(request.keys())}")
+            logger.error(f"Invalid event format - missing required fields. Request keys: {list(request.keys())}")
             raise HTTPException(status_code=400, detail="Invalid event format - use legacy format with event_date, content, and position")
     
     except HTTPException:
-        logger.error(f"[Line 637] HTTPException occurred")
         raise
     except Exception as e:
-        logger.error(f"[Line 640] Exception in save_event: {e}")
-        logger.error(f"[Line 642] Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        logger.error(f"Exception in save_event: {e}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.put("/api/events/{event_id}")
 async def update_event(event_id: int, request: dict, current_user = Depends(get_current_user)):
     """
     Updates an existing non-custody event.
     """
-    logger.info(f"Updating event {event_id}: {request}")
+    logger.debug("Updating event %s: %s", event_id, request)
     try:
         # Check if this is a custody event (position 4) and reject it
         if 'position' in request and request['position'] == 4:
             logger.error(f"Rejecting custody event - position 4 should use /api/custody endpoint")
             raise HTTPException(status_code=400, detail="Custody events should use /api/custody endpoint")
         
-        # Verify the event exists and belongs to the user's family
-        verify_query = events.select().where(
-            (events.c.id == event_id) & 
-            (events.c.family_id == current_user['family_id']) &
-            (events.c.event_type != 'custody')
-        )
-        existing_event = await database.fetch_one(verify_query)
-        
-        if not existing_event:
-            raise HTTPException(status_code=404, detail="Event not found or access denied")
-        
         # Handle legacy event format
         if 'event_date' in request and 'position' in request and 'content' in request:
             legacy_event = LegacyEvent(**request)
-            event_date = datetime.strptime(legacy_event.event_date, '%Y-%m-%d').date()
+            event_date = legacy_event.event_date
             
-            # Update the event
-            update_query = events.update().where(events.c.id == event_id).values(
+            # Update the event only if it exists and belongs to the user's family
+            update_query = events.update().where(
+                (events.c.id == event_id) &
+                (events.c.family_id == current_user['family_id']) &
+                non_custody_event
+            ).values(
                 date=event_date,
                 content=legacy_event.content,
                 position=legacy_event.position
-            )
-            await database.execute(update_query)
+            ).returning(events.c.id)
+            updated_event = await database.fetch_one(update_query)
+            
+            if not updated_event:
+                raise HTTPException(status_code=404, detail="Event not found or access denied")
             
             logger.info(f"Successfully updated event {event_id}: position={legacy_event.position}, content={legacy_event.content}")
             
             return {
                 'id': event_id,
-                'event_date': legacy_event.event_date,
+                'event_date': event_date.isoformat(),
                 'content': legacy_event.content,
                 'position': legacy_event.position
             }
@@ -1491,31 +1931,28 @@ async def update_event(event_id: int, request: dict, current_user = Depends(get_
         raise
     except Exception as e:
         logger.error(f"Exception in update_event: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.delete("/api/events/{event_id}")
 async def delete_event(event_id: int, current_user = Depends(get_current_user)):
     """
     Deletes an existing non-custody event.
     """
-    logger.info(f"Deleting event {event_id}")
+    logger.debug("Deleting event %s", event_id)
     try:
-        # Verify the event exists and belongs to the user's family
-        verify_query = events.select().where(
-            (events.c.id == event_id) & 
+        # Delete the event only if it exists and belongs to the user's family
+        delete_query = events.delete().where(
+            (events.c.id == event_id) &
             (events.c.family_id == current_user['family_id']) &
-            (events.c.event_type != 'custody')
-        )
-        existing_event = await database.fetch_one(verify_query)
+            non_custody_event
+        ).returning(events.c.id)
+        deleted_event = await database.fetch_one(delete_query)
         
-        if not existing_event:
+        if not deleted_event:
             raise HTTPException(status_code=404, detail="Event not found or access denied")
         
-        # Delete the event
-        delete_query = events.delete().where(events.c.id == event_id)
-        await database.execute(delete_query)
-        
         logger.info(f"Successfully deleted event {event_id}")
         return {"status": "success", "message": "Event deleted successfully"}
     
@@ -1523,31 +1960,28 @@ async def delete_event(event_id: int, current_user = Depends(get_current_user)):
         raise
     except Exception as e:
         logger.error(f"Exception in delete_event: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 # MARK: - Notification Email Endpoints
 
 @app.get("/api/notifications/emails", response_model=list[NotificationEmail])
-async def get_notification_emails(current_user = Depends(get_current_user)):
+async def get_notification_emails(request: Request, current_user = Depends(get_current_user)):
     """
     Returns all notification emails for the current user's family.
     """
     query = notification_emails.select().where(notification_emails.c.family_id == current_user['family_id'])
     emails = await database.fetch_all(query)
-    return [NotificationEmail(id=email['id'], email=email['email']) for email in emails]
+    return etag_json_response(request, [{"id": email['id'], "email": email['email']} for email in emails])
 
 @app.post("/api/notifications/emails", response_model=NotificationEmail)
 async def add_notification_email(email_data: AddNotificationEmail, current_user = Depends(get_current_user)):
     """
     Adds a new notification email for the current user's family.
     """
-    query = notification_emails.insert().values(
-        family_id=current_user['family_id'],
-        email=email_data.email
-    )
-    email_id = await database.execute(query)
-    return NotificationEmail(id=email_id, email=email_data.email)
+    email_row = await fetch_one_raw(ADD_NOTIFICATION_EMAIL_SQL, current_user['family_id'], email_data.email, datetime.now())
+    return NotificationEmail(id=email_row['id'], email=email_data.email)
 
 @app.put("/api/notifications/emails/{email_id}")
 async def update_notification_email(email_id: int, email_data: AddNotificationEmail, current_user = Depends(get_current_user)):
@@ -1557,8 +1991,9 @@ async def update_notification_email(email_id: int, email_data: AddNotificationEm
     query = notification_emails.update().where(
         (notification_emails.c.id == email_id) & 
         (notification_emails.c.family_id == current_user['family_id'])
-    ).values(email=email_data.email)
-    await database.execute(query)
+    ).values(email=email_data.email).returning(notification_emails.c.id)
+    if not await database.fetch_one(query):
+        raise HTTPException(status_code=404, detail="Notification email not found")
     return {"status": "success"}
 
 @app.delete("/api/notifications/emails/{email_id}")
@@ -1569,68 +2004,102 @@ async def delete_notification_email(email_id: int, current_user = Depends(get_cu
     query = notification_emails.delete().where(
         (notification_emails.c.id == email_id) & 
         (notification_emails.c.family_id == current_user['family_id'])
-    )
-    await database.execute(query)
+    ).returning(notification_emails.c.id)
+    if not await database.fetch_one(query):
+        raise HTTPException(status_code=404, detail="Notification email not found")
     return {"status": "success"}
 
 @app.get("/api/family/emails", response_model=list[FamilyMemberEmail])
-async def get_family_member_emails(current_user = Depends(get_current_user)):
+async def get_family_member_emails(request: Request, current_user = Depends(get_current_user)):
     """
     Returns the email addresses of all family members (parents) for automatic population in alerts.
     """
-    query = users.select().where(users.c.family_id == current_user['family_id']).order_by(users.c.first_name)
-    family_members = await database.fetch_all(query)
-    
-    return [
-        FamilyMemberEmail(
-            id=str(member['id']),
-            first_name=member['first_name'],
-            email=member['email']
-        )
-        for member in family_members
-    ]
+    async def load():
+        query = users.select().where(users.c.family_id == current_user['family_id']).order_by(users.c.first_name)
+        family_members = await database.fetch_all(query)
+        
+        return [
+            {
+                "id": str(member['id']),
+                "first_name": member['first_name'],
+                "email": member['email']
+            }
+            for member in family_members
+        ]
+
+    # load() already builds the response shape, so send the (possibly cached) dicts as-is
+    return etag_json_response(request, await get_family_cached("emails", current_user['family_id'], load))
 
 @app.get("/api/family/members", response_model=list[FamilyMember])
-async def get_family_members(current_user = Depends(get_current_user)):
+async def get_family_members(request: Request, current_user = Depends(get_current_user)):
     """
     Returns all family members with their contact information including phone numbers.
     """
-    family_id = current_user['family_id']
-    query = users.select().where(users.c.family_id == family_id)
-    family_members_records = await database.fetch_all(query)
-    
-    return [
-        FamilyMember(
-            id=str(member['id']),
-            first_name=member['first_name'],
-            last_name=member['last_name'],
-            email=member['email'],
-            phone_number=member['phone_number'],
-            status=member['status'],
-            last_signed_in=member['last_signed_in'].isoformat() if member['last_signed_in'] else None,
-            last_known_location=member['last_known_location'],
-            last_known_location_timestamp=member['last_known_location_timestamp'].isoformat() if member['last_known_location_timestamp'] else None
-        ) for member in family_members_records
-    ]
+    async def load():
+        family_members_records = await fetch_all_raw(FAMILY_USERS_SQL, current_user['family_id'])
+        
+        return [
+            {
+                "id": str(member['id']),
+                "first_name": member['first_name'],
+                "last_name": member['last_name'],
+                "email": member['email'],
+                "phone_number": member['phone_number'],
+                "status": member['status'],
+                "last_signed_in": member['last_signed_in'].isoformat() if member['last_signed_in'] else None,
+                "last_known_location": member['last_known_location'],
+                "last_known_location_timestamp": member['last_known_location_timestamp'].isoformat() if member['last_known_location_timestamp'] else None
+            } for member in family_members_records
+        ]
+
+    # load() already builds the response shape, so send the (possibly cached) dicts as-is
+    return etag_json_response(request, await get_family_cached("members", current_user['family_id'], load))
 
 # ---------------------- Babysitters API ----------------------
 
 @app.get("/api/babysitters", response_model=list[BabysitterResponse])
-async def get_babysitters(current_user = Depends(get_current_user)):
+async def get_babysitters(
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[int] = None,
+    current_user = Depends(get_current_user)
+):
     """
-    Get all babysitters associated with the current user's family.
+    Get babysitters associated with the current user's family; pass limit (and after) to page through them.
     """
     # Use SQLAlchemy query syntax instead of raw SQL
     query = babysitters.select().select_from(
         babysitters.join(babysitter_families, babysitters.c.id == babysitter_families.c.babysitter_id)
     ).where(
         babysitter_families.c.family_id == current_user['family_id']
-    ).order_by(babysitters.c.first_name, babysitters.c.last_name)
+    ).order_by(babysitters.c.first_name, babysitters.c.last_name, babysitters.c.id)
+    # Paging is opt-in: without a limit every babysitter is returned, as current iOS clients expect
+    if limit is not None:
+        query = query.limit(limit + 1)
+    
+    if after is not None:
+        # Resume after the cursor row while keeping the alphabetical order
+        cursor = await database.fetch_one(babysitters.select().select_from(
+            babysitters.join(babysitter_families, babysitters.c.id == babysitter_families.c.babysitter_id)
+        ).where(
+            (babysitters.c.id == after) &
+            (babysitter_families.c.family_id == current_user['family_id'])
+        ))
+        if not cursor:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        query = query.where(
+            sqlalchemy.tuple_(babysitters.c.first_name, babysitters.c.last_name, babysitters.c.id) >
+            sqlalchemy.tuple_(cursor['first_name'], cursor['last_name'], cursor['id'])
+        )
     
     babysitter_records = await database.fetch_all(query)
+    headers = None
+    if limit is not None and len(babysitter_records) > limit:
+        babysitter_records = babysitter_records[:limit]
+        headers = {"X-Next-Cursor": str(babysitter_records[-1]['id'])}
     
-    return [
-        BabysitterResponse(
+    # Rows come straight from the DB with known types, so skip per-field validation
+    return json_list_response(BABYSITTER_LIST_ADAPTER, [
+        BabysitterResponse.model_construct(
             id=record['id'],
             first_name=record['first_name'],
             last_name=record['last_name'],
@@ -1641,7 +2110,7 @@ async def get_babysitters(current_user = Depends(get_current_user)):
             created_at=str(record['created_at'])
         )
         for record in babysitter_records
-    ]
+    ], headers=headers)
 
 @app.post("/api/babysitters", response_model=BabysitterResponse)
 async def create_babysitter(babysitter_data: BabysitterCreate, current_user = Depends(get_current_user)):
@@ -1649,27 +2118,29 @@ async def create_babysitter(babysitter_data: BabysitterCreate, current_user = De
     Create a new babysitter and associate with the current user's family.
     """
     try:
-        # Insert babysitter
-        babysitter_insert = babysitters.insert().values(
+        # Insert the babysitter and its family link in one statement (so a failed link can't leave an
+        # orphan) and read the new row back from the first CTE. Timestamps are passed explicitly
+        # because Python-side column defaults aren't applied inside a CTE.
+        now = datetime.now()
+        created = babysitters.insert().values(
             first_name=babysitter_data.first_name,
             last_name=babysitter_data.last_name,
             phone_number=babysitter_data.phone_number,
             rate=babysitter_data.rate,
             notes=babysitter_data.notes,
-            created_by_user_id=current_user['id']
-        )
-        babysitter_id = await database.execute(babysitter_insert)
-        
-        # Associate with family
-        family_insert = babysitter_families.insert().values(
-            babysitter_id=babysitter_id,
-            family_id=current_user['family_id'],
-            added_by_user_id=current_user['id']
-        )
-        await database.execute(family_insert)
-        
-        # Fetch the created babysitter
-        babysitter_record = await database.fetch_one(babysitters.select().where(babysitters.c.id == babysitter_id))
+            created_by_user_id=current_user['id'],
+            created_at=now
+        ).returning(babysitters).cte("created")
+        linked = babysitter_families.insert().from_select(
+            ["babysitter_id", "family_id", "added_by_user_id", "added_at"],
+            sqlalchemy.select(
+                created.c.id,
+                sqlalchemy.literal(current_user['family_id'], UUID(as_uuid=True)),
+                sqlalchemy.literal(current_user['id'], UUID(as_uuid=True)),
+                sqlalchemy.literal(now, sqlalchemy.DateTime)
+            )
+        ).cte("linked")
+        babysitter_record = await database.fetch_one(sqlalchemy.select(created).add_cte(linked))
         
         return BabysitterResponse(
             id=babysitter_record['id'],
@@ -1690,29 +2161,19 @@ async def update_babysitter(babysitter_id: int, babysitter_data: BabysitterCreat
     """
     Update a babysitter that belongs to the current user's family.
     """
-    # Check if babysitter belongs to user's family using SQLAlchemy syntax
-    check_query = babysitters.select().select_from(
-        babysitters.join(babysitter_families, babysitters.c.id == babysitter_families.c.babysitter_id)
-    ).where(
-        (babysitters.c.id == babysitter_id) & 
-        (babysitter_families.c.family_id == current_user['family_id'])
-    )
-    existing = await database.fetch_one(check_query)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Babysitter not found")
-    
-    # Update babysitter
-    update_query = babysitters.update().where(babysitters.c.id == babysitter_id).values(
+    # Update babysitter only if it belongs to the user's family, and read back the updated row
+    update_query = babysitters.update().where(
+        (babysitters.c.id == babysitter_id) & babysitter_in_family(current_user['family_id'])
+    ).values(
         first_name=babysitter_data.first_name,
         last_name=babysitter_data.last_name,
         phone_number=babysitter_data.phone_number,
         rate=babysitter_data.rate,
         notes=babysitter_data.notes
-    )
-    await database.execute(update_query)
-    
-    # Fetch updated record
-    babysitter_record = await database.fetch_one(babysitters.select().where(babysitters.c.id == babysitter_id))
+    ).returning(babysitters)
+    babysitter_record = await database.fetch_one(update_query)
+    if not babysitter_record:
+        raise HTTPException(status_code=404, detail="Babysitter not found")
     
     return BabysitterResponse(
         id=babysitter_record['id'],
@@ -1734,10 +2195,10 @@ async def delete_babysitter(babysitter_id: int, current_user = Depends(get_curre
     delete_query = babysitter_families.delete().where(
         (babysitter_families.c.babysitter_id == babysitter_id) &
         (babysitter_families.c.family_id == current_user['family_id'])
-    )
-    result = await database.execute(delete_query)
+    ).returning(babysitter_families.c.babysitter_id)
+    result = await database.fetch_one(delete_query)
     
-    if result == 0:
+    if result is None:
         raise HTTPException(status_code=404, detail="Babysitter not found in your family")
     
     return {"status": "success", "message": "Babysitter removed from family"}
@@ -1745,18 +2206,43 @@ async def delete_babysitter(babysitter_id: int, current_user = Depends(get_curre
 # ---------------------- Emergency Contacts API ----------------------
 
 @app.get("/api/emergency-contacts", response_model=list[EmergencyContactResponse])
-async def get_emergency_contacts(current_user = Depends(get_current_user)):
+async def get_emergency_contacts(
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[int] = None,
+    current_user = Depends(get_current_user)
+):
     """
-    Get all emergency contacts for the current user's family.
+    Get emergency contacts for the current user's family; pass limit (and after) to page through them.
     """
     query = emergency_contacts.select().where(
         emergency_contacts.c.family_id == current_user['family_id']
-    ).order_by(emergency_contacts.c.first_name, emergency_contacts.c.last_name)
+    ).order_by(emergency_contacts.c.first_name, emergency_contacts.c.last_name, emergency_contacts.c.id)
+    # Paging is opt-in: without a limit every contact is returned, as current iOS clients expect
+    if limit is not None:
+        query = query.limit(limit + 1)
+    
+    if after is not None:
+        # Resume after the cursor row while keeping the alphabetical order
+        cursor = await database.fetch_one(emergency_contacts.select().where(
+            (emergency_contacts.c.id == after) &
+            (emergency_contacts.c.family_id == current_user['family_id'])
+        ))
+        if not cursor:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        query = query.where(
+            sqlalchemy.tuple_(emergency_contacts.c.first_name, emergency_contacts.c.last_name, emergency_contacts.c.id) >
+            sqlalchemy.tuple_(cursor['first_name'], cursor['last_name'], cursor['id'])
+        )
     
     contact_records = await database.fetch_all(query)
+    headers = None
+    if limit is not None and len(contact_records) > limit:
+        contact_records = contact_records[:limit]
+        headers = {"X-Next-Cursor": str(contact_records[-1]['id'])}
     
-    return [
-        EmergencyContactResponse(
+    # Rows come straight from the DB with known types, so skip per-field validation
+    return json_list_response(EMERGENCY_CONTACT_LIST_ADAPTER, [
+        EmergencyContactResponse.model_construct(
             id=record['id'],
             first_name=record['first_name'],
             last_name=record['last_name'],
@@ -1767,7 +2253,7 @@ async def get_emergency_contacts(current_user = Depends(get_current_user)):
             created_at=str(record['created_at'])
         )
         for record in contact_records
-    ]
+    ], headers=headers)
 
 @app.post("/api/emergency-contacts", response_model=EmergencyContactResponse)
 async def create_emergency_contact(contact_data: EmergencyContactCreate, current_user = Depends(get_current_user)):
@@ -1783,11 +2269,8 @@ async def create_emergency_contact(contact_data: EmergencyContactCreate, current
             relationship=contact_data.relationship,
             notes=contact_data.notes,
             created_by_user_id=current_user['id']
-        )
-        contact_id = await database.execute(insert_query)
-        
-        # Fetch the created contact
-        contact_record = await database.fetch_one(emergency_contacts.select().where(emergency_contacts.c.id == contact_id))
+        ).returning(emergency_contacts)
+        contact_record = await database.fetch_one(insert_query)
         
         return EmergencyContactResponse(
             id=contact_record['id'],
@@ -1808,28 +2291,20 @@ async def update_emergency_contact(contact_id: int, contact_data: EmergencyConta
     """
     Update an emergency contact that belongs to the current user's family.
     """
-    # Check if contact belongs to user's family
-    existing = await database.fetch_one(
-        emergency_contacts.select().where(
-            (emergency_contacts.c.id == contact_id) &
-            (emergency_contacts.c.family_id == current_user['family_id'])
-        )
-    )
-    if not existing:
-        raise HTTPException(status_code=404, detail="Emergency contact not found")
-    
-    # Update contact
-    update_query = emergency_contacts.update().where(emergency_contacts.c.id == contact_id).values(
+    # Update contact only if it belongs to the user's family, and read back the updated row
+    update_query = emergency_contacts.update().where(
+        (emergency_contacts.c.id == contact_id) &
+        (emergency_contacts.c.family_id == current_user['family_id'])
+    ).values(
         first_name=contact_data.first_name,
         last_name=contact_data.last_name,
         phone_number=contact_data.phone_number,
         relationship=contact_data.relationship,
         notes=contact_data.notes
-    )
-    await database.execute(update_query)
-    
-    # Fetch updated record
-    contact_record = await database.fetch_one(emergency_contacts.select().where(emergency_contacts.c.id == contact_id))
+    ).returning(emergency_contacts)
+    contact_record = await database.fetch_one(update_query)
+    if not contact_record:
+        raise HTTPException(status_code=404, detail="Emergency contact not found")
     
     return EmergencyContactResponse(
         id=contact_record['id'],
@@ -1850,10 +2325,10 @@ async def delete_emergency_contact(contact_id: int, current_user = Depends(get_c
     delete_query = emergency_contacts.delete().where(
         (emergency_contacts.c.id == contact_id) &
         (emergency_contacts.c.family_id == current_user['family_id'])
-    )
-    result = await database.execute(delete_query)
+    ).returning(emergency_contacts.c.id)
+    result = await database.fetch_one(delete_query)
     
-    if result == 0:
+    if result is None:
         raise HTTPException(status_code=404, detail="Emergency contact not found")
     
     return {"status": "success", "message": "Emergency contact deleted"}
@@ -1862,12 +2337,53 @@ async def delete_emergency_contact(contact_id: int, current_user = Depends(get_c
 
 # ---------------------- Group Chat API ----------------------
 
+# ON CONFLICT needs the unique_group_chat_contact index from migrate_hot_path_indexes.py. Postgres
+# reports its absence as 42P10 ("no unique or exclusion constraint matching the ON CONFLICT
+# specification"); after that the endpoint falls back to SELECT-then-INSERT.
+NO_CONFLICT_TARGET_SQLSTATE = "42P10"
+group_chat_upsert_supported = True
+
 @app.post("/api/group-chat")
 async def create_or_get_group_chat(chat_data: GroupChatCreate, current_user = Depends(get_current_user)):
     """
     Create a group chat identifier or return existing one for the given contact.
     This prevents duplicate group chats for the same contact.
     """
+    global group_chat_upsert_supported
+    if group_chat_upsert_supported:
+        # Insert a new group chat, or return the existing one for this contact, in a single round trip.
+        # The no-op DO UPDATE makes RETURNING yield the existing row; xmax = 0 only for freshly inserted rows.
+        upsert_query = postgresql.insert(group_chats).values(
+            family_id=current_user['family_id'],
+            contact_type=chat_data.contact_type,
+            contact_id=chat_data.contact_id,
+            group_identifier=secrets.token_hex(8),
+            created_by_user_id=current_user['id'],
+            created_at=datetime.now()
+        ).on_conflict_do_update(
+            index_elements=[group_chats.c.family_id, group_chats.c.contact_type, group_chats.c.contact_id],
+            set_={"group_identifier": group_chats.c.group_identifier}
+        ).returning(
+            group_chats.c.group_identifier,
+            group_chats.c.created_at,
+            sqlalchemy.literal_column("(xmax = 0)").label("inserted")
+        )
+        try:
+            group_chat = await database.fetch_one(upsert_query)
+            return {
+                "group_identifier": group_chat['group_identifier'],
+                "exists": not group_chat['inserted'],
+                "created_at": str(group_chat['created_at'])
+            }
+        except Exception as e:
+            if getattr(e, 'sqlstate', None) != NO_CONFLICT_TARGET_SQLSTATE:
+                logger.error(f"Error creating group chat: {e}")
+                raise HTTPException(status_code=500, detail="Failed to create group chat")
+            # The unique_group_chat_contact index is missing; use SELECT-then-INSERT until this worker restarts
+            group_chat_upsert_supported = False
+            logger.warning("unique_group_chat_contact index missing; run migrate_hot_path_indexes.py. "
+                           "Falling back to SELECT-then-INSERT for group chats.")
+
     # Check if group chat already exists
     existing_query = group_chats.select().where(
         (group_chats.c.family_id == current_user['family_id']) &
@@ -1883,13 +2399,9 @@ async def create_or_get_group_chat(chat_data: GroupChatCreate, current_user = De
             "created_at": str(existing_chat['created_at'])
         }
     
-    # Create new group chat identifier
-    import hashlib
-    import time
-    
-    # Generate unique group identifier
-    unique_string = f"{current_user['family_id']}-{chat_data.contact_type}-{chat_data.contact_id}-{time.time()}"
-    group_identifier = hashlib.md5(unique_string.encode()).hexdigest()[:16]
+    # Generate a new random 16-character group identifier
+    group_identifier = secrets.token_hex(8)
+    created_at = datetime.now()
     
     try:
         insert_query = group_chats.insert().values(
@@ -1897,170 +2409,265 @@ async def create_or_get_group_chat(chat_data: GroupChatCreate, current_user = De
             contact_type=chat_data.contact_type,
             contact_id=chat_data.contact_id,
             group_identifier=group_identifier,
-            created_by_user_id=current_user['id']
+            created_by_user_id=current_user['id'],
+            created_at=created_at
         )
         await database.execute(insert_query)
         
         return {
             "group_identifier": group_identifier,
             "exists": False,
-            "created_at": str(datetime.now())
+            "created_at": str(created_at)
         }
     except Exception as e:
         logger.error(f"Error creating group chat: {e}")
         raise HTTPException(status_code=500, detail="Failed to create group chat")
 
+# Fixed parts of the custody change push; only the names and date vary per send
+CUSTODY_CHANGE_APS_BASE = {"sound": "default", "badge": 1, "category": "CUSTODY_CHANGE"}
+CUSTODY_CHANGE_CUSTOM_BASE = {"type": "custody_change", "deep_link": "calndr://schedule"}
+
+@lru_cache(maxsize=512)
+def format_long_date(d: date) -> str:
+    """'Monday, July 7' style date for notification text; custody changes cluster on a few dates"""
+    return d.strftime('%A, %B %-d')
+
+def publish_sns_messages(target_arns: List[str], message: str) -> int:
+    """Publish one SNS message to several endpoints in a single worker-thread hop; returns how many succeeded"""
+    sent = 0
+    for target_arn in target_arns:
+        try:
+            sns_client.publish(TargetArn=target_arn, Message=message, MessageStructure='json')
+            sent += 1
+        except Exception as e:
+            # One disabled endpoint shouldn't stop the rest of the family being notified
+            logger.error("Failed to publish SNS message to %s: %s", target_arn, e, exc_info=True)
+    return sent
+
 async def send_custody_change_notification(sender_id: uuid.UUID, family_id: uuid.UUID, event_date: date):
     if not sns_client:
         logger.warning("SNS client not configured. Skipping push notification.")
         return
 
-    other_user_query = users.select().where(
-        (users.c.family_id == family_id) & 
-        (users.c.id != sender_id) &
-        (users.c.sns_endpoint_arn.isnot(None))
-    )
-    other_user = await database.fetch_one(other_user_query)
-
-    if not other_user:
-        logger.warning(f"Could not find another user in family '{family_id}' with an SNS endpoint to notify.")
+    recipients = await fetch_all_raw(CUSTODY_CHANGE_RECIPIENTS_SQL, family_id, sender_id, event_date)
+    if not recipients:
+        logger.warning("Could not find another user in family '%s' with an SNS endpoint to notify.", family_id)
         return
-        
-    sender = await database.fetch_one(users.select().where(users.c.id == sender_id))
-    sender_name = sender['first_name'] if sender else "Someone"
-    
-    custodian_query = custody.select().where(
-        (custody.c.family_id == family_id) & 
-        (custody.c.date == event_date)
-    )
-    custody_record = await database.fetch_one(custodian_query)
-    
-    custodian_name = "Unknown"
-    if custody_record:
-        custodian = await database.fetch_one(users.select().where(users.c.id == custody_record['custodian_id']))
-        custodian_name = custodian['first_name'] if custodian else "Unknown"
+
+    # Every row carries the same names; they're NULL if the sender row is gone or the day has no custodian
+    sender_name = recipients[0]['sender_name'] or "Someone"
+    custodian_name = recipients[0]['custodian_name'] or "Unknown"
     
-    formatted_date = event_date.strftime('%A, %B %-d')
+    formatted_date = format_long_date(event_date)
     
     # Construct the APNS payload for SNS
-    aps_payload = {
-        "aps": {
+    aps_payload = CUSTODY_CHANGE_CUSTOM_BASE | {
+        "aps": CUSTODY_CHANGE_APS_BASE | {
             "alert": {
                 "title": "📅 Schedule Updated",
                 "subtitle": f"{custodian_name} now has custody",
                 "body": f"{sender_name} changed the schedule for {formatted_date}. Tap to manage your schedule."
-            },
-            "sound": "default",
-            "badge": 1,
-            "category": "CUSTODY_CHANGE"
+            }
         },
-        "type": "custody_change",
         "date": event_date.isoformat(),
         "custodian": custodian_name,
-        "sender": sender_name,
-        "deep_link": "calndr://schedule"
+        "sender": sender_name
     }
 
     # The ARN determines if it's sandbox or production, so we use the generic "APNS" key
     message = {
-        "APNS": json.dumps(aps_payload)
+        "APNS": orjson.dumps(aps_payload).decode()
     }
     
-    try:
-        logger.info(f"Sending custody change notification to endpoint for user {other_user['first_name']}")
-        sns_client.publish(
-            TargetArn=other_user['sns_endpoint_arn'],
-            Message=json.dumps(message),
-            MessageStructure='json'
-        )
-        logger.info("Custody change push notification sent successfully via SNS.")
-    except Exception as e:
-        logger.error(f"Failed to send push notification via SNS: {e}", exc_info=True)
+    logger.info("Sending custody change notification to %d family member(s)", len(recipients))
+    # boto3 blocks, so publish to every recipient from one SNS worker thread instead of on the event loop
+    sent = await run_sns(
+        publish_sns_messages,
+        [r['sns_endpoint_arn'] for r in recipients],
+        orjson.dumps(message).decode()
+    )
+    logger.info("Custody change push notification sent via SNS to %d/%d endpoints.", sent, len(recipients))
 
 
 # --- School Events Caching ---
 SCHOOL_EVENTS_CACHE: Optional[List[Dict[str, Any]]] = None
 SCHOOL_EVENTS_CACHE_TIME: Optional[datetime] = None
+# Encoded body and its validator, refreshed together with the cache so requests don't re-encode/re-hash
+SCHOOL_EVENTS_BODY: Optional[bytes] = None
+SCHOOL_EVENTS_ETAG: Optional[str] = None
 SCHOOL_EVENTS_CACHE_TTL_HOURS = 24
+# With Redis holding the shared 24h copy, the in-process copy only needs to absorb bursts
+SCHOOL_EVENTS_LOCAL_TTL_MINUTES = 5
+SCHOOL_EVENTS_REDIS_KEY = "school_events:v1"
+# After a failed scrape, requests get the previous copy (or nothing) for a while instead of retrying in turn
+SCHOOL_EVENTS_FAILED_AT: Optional[datetime] = None
+SCHOOL_EVENTS_RETRY_MINUTES = 5
+
+
+def school_events_local_ttl() -> timedelta:
+    """How long the in-process copy of the school events stays fresh"""
+    if redis_client is not None:
+        return timedelta(minutes=SCHOOL_EVENTS_LOCAL_TTL_MINUTES)
+    return timedelta(hours=SCHOOL_EVENTS_CACHE_TTL_HOURS)
+
+
+def school_events_retry_pending() -> bool:
+    """Whether the last scrape failed recently enough that the next one should wait"""
+    return (
+        SCHOOL_EVENTS_FAILED_AT is not None
+        and datetime.now(timezone.utc) - SCHOOL_EVENTS_FAILED_AT < timedelta(minutes=SCHOOL_EVENTS_RETRY_MINUTES)
+    )
+
+# Patterns used while scraping the school calendar, compiled once rather than per paragraph
+LT_HEADER_RE = re.compile(r'THE LEARNING TREE CLOSINGS IN 202[0-9]')
+YEAR_RE = re.compile(r'(\d{4})')
+# Lower-cased full and abbreviated month names -> month number, so scraped dates skip strptime
+MONTHS = {
+    name: number
+    for number, full_name in enumerate(
+        ["january", "february", "march", "april", "may", "june",
+         "july", "august", "september", "october", "november", "december"], start=1
+    )
+    for name in (full_name, full_name[:3])
+}
+MONTHS["sept"] = 9
+# One pass over "Event Name - Weekday, Month Day": the name, then an optional dash and weekday, then the date
+EVENT_LINE_RE = re.compile(
+    r'^(?P<name>.*?)\s*(?:[-\u2013]\s*)?(?:\w+,\s*)?'
+    r'\b(?P<month>January|February|March|April|May|June|July|August|September|October|November|December'
+    r'|Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sept|Sep|Oct|Nov|Dec)\.?\s+(?P<day>\d{1,2})\b',
+    re.IGNORECASE
+)
+
+# Only one request at a time scrapes the site; the rest wait for (or serve) the cached copy
+school_events_lock = asyncio.Lock()
+
+# Kept open between cache refreshes so the TCP/TLS connection to the school site is reused
+school_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_school_http_client() -> httpx.AsyncClient:
+    """Return the shared client for the school calendar site, creating it on first use"""
+    global school_http_client
+    if school_http_client is None:
+        school_http_client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300)
+        )
+    return school_http_client
+
+
+def set_school_events_cache(events: List[Dict[str, str]]):
+    """Replace the in-process school events cache along with its encoded body and ETag"""
+    global SCHOOL_EVENTS_CACHE, SCHOOL_EVENTS_CACHE_TIME, SCHOOL_EVENTS_BODY, SCHOOL_EVENTS_ETAG
+    SCHOOL_EVENTS_CACHE = events
+    SCHOOL_EVENTS_CACHE_TIME = datetime.now(timezone.utc)
+    SCHOOL_EVENTS_BODY = orjson.dumps(events)
+    # Weak validator: GZipMiddleware may re-encode the body, but the content is equivalent
+    SCHOOL_EVENTS_ETAG = f'W/"{hashlib.sha1(SCHOOL_EVENTS_BODY).hexdigest()}"'
 
 
 async def fetch_school_events() -> List[Dict[str, str]]:
-    """Scrape school closing events and return list of {date, title}. Uses 24-hour in-memory cache."""
-    global SCHOOL_EVENTS_CACHE, SCHOOL_EVENTS_CACHE_TIME
-    # Return cached copy if fresh
-    if SCHOOL_EVENTS_CACHE and SCHOOL_EVENTS_CACHE_TIME:
-        if datetime.now(timezone.utc) - SCHOOL_EVENTS_CACHE_TIME < timedelta(hours=SCHOOL_EVENTS_CACHE_TTL_HOURS):
+    """Return school closing events as a list of {date, title}. Uses a 24-hour cache in Redis (if configured) and in memory."""
+    # Return cached copy if fresh; an empty scrape is a valid result and is cached like any other
+    if SCHOOL_EVENTS_CACHE is not None:
+        # Expire up to 10% early at random so refreshes don't all line up on the TTL boundary
+        ttl = school_events_local_ttl() * (1 - random.random() * 0.1)
+        if datetime.now(timezone.utc) - SCHOOL_EVENTS_CACHE_TIME < ttl:
             logger.info("Returning cached school events.")
             return SCHOOL_EVENTS_CACHE
+        # A refresh is already running; serve the stale copy instead of queueing behind it
+        if school_events_lock.locked():
+            return SCHOOL_EVENTS_CACHE
+    if school_events_retry_pending():
+        return SCHOOL_EVENTS_CACHE or []
+
+    async with school_events_lock:
+        # Another request may have refreshed the cache (or failed to) while we waited for the lock
+        if SCHOOL_EVENTS_CACHE is not None:
+            if datetime.now(timezone.utc) - SCHOOL_EVENTS_CACHE_TIME < school_events_local_ttl():
+                return SCHOOL_EVENTS_CACHE
+        if school_events_retry_pending():
+            return SCHOOL_EVENTS_CACHE or []
+        # Another worker (or this one before a restart) may already have scraped today
+        shared_events = await redis_get_json(SCHOOL_EVENTS_REDIS_KEY)
+        if shared_events:
+            set_school_events_cache(shared_events)
+            return SCHOOL_EVENTS_CACHE
+        return await scrape_school_events()
 
+
+def parse_school_events_html(html: str) -> Dict[str, str]:
+    """Parse the school calendar page into {iso_date: event_name}. CPU-bound; run it off the event loop."""
+    scraped_events = {}
+    tree = lxml.html.fromstring(html)
+    
+    # Find the closings header to anchor the search; it carries the year the dates below belong to
+    header = next((p for p in tree.iter('p') if LT_HEADER_RE.search(p.text_content())), None)
+    if header is None:
+        logger.warning("Could not find the school closings header.")
+        return scraped_events
+
+    # LT_HEADER_RE only matches a header with a year in it
+    year = YEAR_RE.search(header.text_content()).group(1)
+    for sibling in header.itersiblings():
+        if not isinstance(sibling.tag, str):
+            continue  # Comments and processing instructions, which find_next_siblings() skipped
+        if sibling.tag != 'p':
+            break
+        
+        # Same as get_text(separator=' ', strip=True): stripped text nodes joined by spaces
+        text = ' '.join(chunk.strip() for chunk in sibling.itertext() if chunk.strip())
+        if not text:
+            continue
+
+        match = EVENT_LINE_RE.match(text)
+        if not match:
+            logger.warning("Could not parse date from text: '%s'", text)
+            continue
+        event_name, month, day = match.group('name', 'month', 'day')
+
+        event_year = year
+        if "new year" in event_name.lower() and "2026" in text.lower():
+            event_year = "2026"
+
+        try:
+            # EVENT_LINE_RE only matches month spellings that are keys of MONTHS
+            event_date = date(int(event_year), MONTHS[month.lower()], int(day))
+            if event_name:
+                scraped_events[event_date.isoformat()] = event_name
+        except ValueError:
+            logger.warning("Could not parse date from: '%s %s' in text: '%s'", month, day, text)
+
+    return scraped_events
+
+
+async def scrape_school_events() -> List[Dict[str, str]]:
+    """Scrape school closing events into the cache, falling back to the previous copy on failure."""
+    global SCHOOL_EVENTS_FAILED_AT
     logger.info("Fetching fresh school events from the website...")
     url = "https://www.thelearningtreewilmington.com/calendar-of-events/"
-    scraped_events = {}
 
     try:
-        async with httpx.AsyncClient(follow_redirects=True, timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the header for the 2025 closings to anchor the search
-        header = soup.find('p', string=re.compile(r'THE LEARNING TREE CLOSINGS IN 2025'))
-        if header:
-            for sibling in header.find_next_siblings():
-                if sibling.name != 'p':
-                    break
-                
-                text = sibling.get_text(separator=' ', strip=True)
-                if not text:
-                    continue
+        response = await get_school_http_client().get(url)
+        response.raise_for_status()
 
-                parts = text.split('-')
-                
-                if len(parts) > 1:
-                    event_name = parts[0].strip()
-                    date_str = "-".join(parts[1:]).strip()
-                else:
-                    event_name = text
-                    date_str = ""
-
-                date_match = re.search(r'(\w+\s+\d+)', text)
-                if date_match:
-                    date_str = date_match.group(1)
-
-                year_match = re.search(r'(\d{4})', header.text)
-                year = year_match.group(1) if year_match else "2025"
-                
-                if "new year" in event_name.lower() and "2026" in text.lower():
-                    year = "2026"
-
-                event_name = event_name.replace(date_str, "").strip()
-                event_name = re.sub(r'\s*-\s*$', '', event_name)
-
-                try:
-                    date_str_no_weekday = re.sub(r'^\w+,\s*', '', date_str)
-                    full_date_str = f"{date_str_no_weekday}, {year}"
-                    full_date_str = full_date_str.replace("Jan ", "January ")
-
-                    event_date = datetime.strptime(full_date_str, '%B %d, %Y')
-                    iso_date = event_date.strftime('%Y-%m-%d')
-                    if event_name:
-                        scraped_events[iso_date] = event_name
-                except ValueError:
-                    logger.warning(f"Could not parse date from: '{date_str}' in text: '{text}'")
-        else:
-            logger.warning("Could not find the school closings header for 2025.")
+        # Parsing walks the whole page, so keep it off the event loop
+        scraped_events = await asyncio.to_thread(parse_school_events_html, response.text)
 
     except Exception as e:
-        logger.error(f"Failed to scrape or parse school events: {e}", exc_info=True)
+        logger.error("Failed to scrape or parse school events: %s", e, exc_info=True)
+        SCHOOL_EVENTS_FAILED_AT = datetime.now(timezone.utc)
         # Return old cache if fetching fails to avoid returning nothing on a temporary error
-        if SCHOOL_EVENTS_CACHE:
-            return SCHOOL_EVENTS_CACHE
-        return []
+        return SCHOOL_EVENTS_CACHE or []
 
-    logger.info(f"Successfully scraped {len(scraped_events)} school events.")
-    SCHOOL_EVENTS_CACHE = [{"date": d, "title": name} for d, name in scraped_events.items()]
-    SCHOOL_EVENTS_CACHE_TIME = datetime.now(timezone.utc)
+    logger.info("Successfully scraped %d school events.", len(scraped_events))
+    SCHOOL_EVENTS_FAILED_AT = None
+    set_school_events_cache([{"date": d, "title": name} for d, name in scraped_events.items()])
+    if SCHOOL_EVENTS_CACHE:
+        await redis_set_json(SCHOOL_EVENTS_REDIS_KEY, SCHOOL_EVENTS_CACHE, SCHOOL_EVENTS_CACHE_TTL_HOURS * 3600)
     return SCHOOL_EVENTS_CACHE
 
 
@@ -2098,18 +2705,15 @@ async def create_child(child_data: ChildCreate, current_user = Depends(get_curre
         # Generate UUID for new child
         child_id = uuid.uuid4()
         
-        # Insert child
+        # Insert child and read it back in the same statement
         child_insert = children.insert().values(
             id=child_id,
             family_id=current_user['family_id'],
             first_name=child_data.first_name,
             last_name=child_data.last_name,
             dob=dob_date
-        )
-        await database.execute(child_insert)
-        
-        # Fetch the created child
-        child_record = await database.fetch_one(children.select().where(children.c.id == child_id))
+        ).returning(children)
+        child_record = await database.fetch_one(child_insert)
         
         return ChildResponse(
             id=uuid_to_string(child_record['id']),
@@ -2133,28 +2737,21 @@ async def update_child(child_id: str, child_data: ChildCreate, current_user = De
         # Parse child_id as UUID
         child_uuid = uuid.UUID(child_id)
         
-        # Check if child belongs to user's family
-        check_query = children.select().where(
-            (children.c.id == child_uuid) & 
-            (children.c.family_id == current_user['family_id'])
-        )
-        existing = await database.fetch_one(check_query)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Child not found")
-        
         # Parse the date string
         dob_date = datetime.strptime(child_data.dob, '%Y-%m-%d').date()
         
-        # Update child
-        update_query = children.update().where(children.c.id == child_uuid).values(
+        # Update child only if it belongs to the user's family, and read back the updated row
+        update_query = children.update().where(
+            (children.c.id == child_uuid) & 
+            (children.c.family_id == current_user['family_id'])
+        ).values(
             first_name=child_data.first_name,
             last_name=child_data.last_name,
             dob=dob_date
-        )
-        await database.execute(update_query)
-        
-        # Fetch updated record
-        child_record = await database.fetch_one(children.select().where(children.c.id == child_uuid))
+        ).returning(children)
+        child_record = await database.fetch_one(update_query)
+        if not child_record:
+            raise HTTPException(status_code=404, detail="Child not found")
         
         return ChildResponse(
             id=uuid_to_string(child_record['id']),
@@ -2163,6 +2760,8 @@ async def update_child(child_id: str, child_data: ChildCreate, current_user = De
             dob=str(child_record['dob']),
             family_id=uuid_to_string(child_record['family_id'])
         )
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid child ID or date format")
     except Exception as e:
@@ -2198,12 +2797,19 @@ async def delete_child(child_id: str, current_user = Depends(get_current_user)):
         logger.error(f"Error deleting child: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete child")
 
-@app.get("/api/school-events")
-async def get_school_events(current_user = Depends(get_current_user)):
+@app.get("/api/school-events", response_class=ORJSONResponse)
+async def get_school_events(request: Request, current_user = Depends(get_current_user)):
     """Returns a JSON array of school events scraped from the Learning Tree website."""
     try:
         events = await fetch_school_events()
-        return events
+        if not events or events is not SCHOOL_EVENTS_CACHE:
+            return events
+        
+        # The list changes at most daily, so let clients revalidate with If-None-Match and skip the body
+        headers = {"ETag": SCHOOL_EVENTS_ETAG, "Cache-Control": "public, max-age=86400"}
+        if request.headers.get("if-none-match") == SCHOOL_EVENTS_ETAG:
+            return Response(status_code=304, headers=headers)
+        return Response(content=SCHOOL_EVENTS_BODY, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error retrieving school events: {e}")
         raise HTTPException(status_code=500, detail="Unable to retrieve school events")
@@ -2244,7 +2850,8 @@ async def update_user_preferences(
         return {"status": "success", "message": "Preferences updated successfully"}
     except Exception as e:
         logger.error(f"Error updating user preferences: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(f"Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Failed to update preferences")
 
 # ---------------------- Notification Scheduling ----------------------
@@ -2347,14 +2954,15 @@ async def send_reminder_notification(endpoint_arn: str, reminder_text: str, remi
         platform_key = "APNS_SANDBOX" if "APNS_SANDBOX" in SNS_PLATFORM_APPLICATION_ARN else "APNS"
 
         message = {
-            platform_key: json.dumps(aps_payload)
+            platform_key: orjson.dumps(aps_payload).decode()
         }
         
         # Send the notification via SNS
         logger.info(f"Sending SNS reminder to endpoint {endpoint_arn}")
-        sns_client.publish(
+        await run_sns(
+            sns_client.publish,
             TargetArn=endpoint_arn,
-            Message=json.dumps(message),
+            Message=orjson.dumps(message).decode(),
             MessageStructure='json'
         )
         logger.info(f"Sent reminder notification to endpoint {endpoint_arn}")
@@ -2375,8 +2983,8 @@ async def get_reminders(
     Get reminders for the current user's family within a date range.
     """
     try:
-        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+        start_date_obj = date.fromisoformat(start_date)
+        end_date_obj = date.fromisoformat(end_date)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
@@ -2587,6 +3195,7 @@ async def update_user_location(location_data: LocationUpdateRequest, current_use
     
     try:
         await database.execute(update_query)
+        await invalidate_family_cache(current_user['family_id'])
         return {"status": "success", "message": "Location updated successfully."}
     except Exception as e:
         logger.error(f"Failed to update user location for user {current_user['id']}: {e}", exc_info=True)
@@ -2625,14 +3234,15 @@ async def request_location(target_user_id: str, current_user = Depends(get_curre
 
     platform_key = "APNS_SANDBOX" if "APNS_SANDBOX" in SNS_PLATFORM_APPLICATION_ARN else "APNS"
     message = {
-        platform_key: json.dumps(aps_payload)
+        platform_key: orjson.dumps(aps_payload).decode()
     }
 
     try:
         logger.info(f"Sending location request to user {target_user_id} from user {current_user['id']}")
-        sns_client.publish(
+        await run_sns(
+            sns_client.publish,
             TargetArn=target_user['sns_endpoint_arn'],
-            Message=json.dumps(message),
+            Message=orjson.dumps(message).decode(),
             MessageStructure='json'
         )
         return {"status": "success", "message": "Location request sent."}
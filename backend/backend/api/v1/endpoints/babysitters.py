@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
 from typing import List
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import UUID
 
 from core.database import database
 from core.security import get_current_user
@@ -43,27 +46,29 @@ async def create_babysitter(babysitter_data: BabysitterCreate, current_user = De
     Create a new babysitter and associate with the current user's family.
     """
     try:
-        # Insert babysitter
-        babysitter_insert = babysitters.insert().values(
+        # Insert the babysitter and its family link in one statement (so a failed link can't leave an
+        # orphan) and read the new row back from the first CTE. Timestamps are passed explicitly
+        # because Python-side column defaults aren't applied inside a CTE.
+        now = datetime.now()
+        created = babysitters.insert().values(
             first_name=babysitter_data.first_name,
             last_name=babysitter_data.last_name,
             phone_number=babysitter_data.phone_number,
             rate=babysitter_data.rate,
             notes=babysitter_data.notes,
-            created_by_user_id=current_user['id']
-        )
-        babysitter_id = await database.execute(babysitter_insert)
-        
-        # Associate with family
-        family_insert = babysitter_families.insert().values(
-            babysitter_id=babysitter_id,
-            family_id=current_user['family_id'],
-            added_by_user_id=current_user['id']
-        )
-        await database.execute(family_insert)
-        
-        # Fetch the created babysitter
-        babysitter_record = await database.fetch_one(babysitters.select().where(babysitters.c.id == babysitter_id))
+            created_by_user_id=current_user['id'],
+            created_at=now
+        ).returning(babysitters).cte("created")
+        linked = babysitter_families.insert().from_select(
+            ["babysitter_id", "family_id", "added_by_user_id", "added_at"],
+            sqlalchemy.select(
+                created.c.id,
+                sqlalchemy.literal(current_user['family_id'], UUID(as_uuid=True)),
+                sqlalchemy.literal(current_user['id'], UUID(as_uuid=True)),
+                sqlalchemy.literal(now, sqlalchemy.DateTime)
+            )
+        ).cte("linked")
+        babysitter_record = await database.fetch_one(sqlalchemy.select(created).add_cte(linked))
         
         return BabysitterResponse(
             id=babysitter_record['id'],
@@ -84,29 +89,23 @@ async def update_babysitter(babysitter_id: int, babysitter_data: BabysitterCreat
     """
     Update a babysitter that belongs to the current user's family.
     """
-    # Check if babysitter belongs to user's family using SQLAlchemy syntax
-    check_query = babysitters.select().select_from(
-        babysitters.join(babysitter_families, babysitters.c.id == babysitter_families.c.babysitter_id)
-    ).where(
-        (babysitters.c.id == babysitter_id) & 
+    # Update babysitter only if it belongs to the user's family, and read back the updated row
+    in_family = sqlalchemy.exists().where(
+        (babysitter_families.c.babysitter_id == babysitters.c.id) &
         (babysitter_families.c.family_id == current_user['family_id'])
     )
-    existing = await database.fetch_one(check_query)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Babysitter not found")
-    
-    # Update babysitter
-    update_query = babysitters.update().where(babysitters.c.id == babysitter_id).values(
+    update_query = babysitters.update().where(
+        (babysitters.c.id == babysitter_id) & in_family
+    ).values(
         first_name=babysitter_data.first_name,
         last_name=babysitter_data.last_name,
         phone_number=babysitter_data.phone_number,
         rate=babysitter_data.rate,
         notes=babysitter_data.notes
-    )
-    await database.execute(update_query)
-    
-    # Fetch updated record
-    babysitter_record = await database.fetch_one(babysitters.select().where(babysitters.c.id == babysitter_id))
+    ).returning(babysitters)
+    babysitter_record = await database.fetch_one(update_query)
+    if not babysitter_record:
+        raise HTTPException(status_code=404, detail="Babysitter not found")
     
     return BabysitterResponse(
         id=babysitter_record['id'],
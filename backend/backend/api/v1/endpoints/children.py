@@ -45,18 +45,15 @@ async def create_child(child_data: ChildCreate, current_user = Depends(get_curre
         # Generate UUID for new child
         child_id = uuid.uuid4()
         
-        # Insert child
+        # Insert child and read it back in the same statement
         child_insert = children.insert().values(
             id=child_id,
             family_id=current_user['family_id'],
             first_name=child_data.first_name,
             last_name=child_data.last_name,
             dob=dob_date
-        )
-        await database.execute(child_insert)
-        
-        # Fetch the created child
-        child_record = await database.fetch_one(children.select().where(children.c.id == child_id))
+        ).returning(children)
+        child_record = await database.fetch_one(child_insert)
         
         return ChildResponse(
             id=uuid_to_string(child_record['id']),
@@ -80,28 +77,21 @@ async def update_child(child_id: str, child_data: ChildCreate, current_user = De
         # Parse child_id as UUID
         child_uuid = uuid.UUID(child_id)
         
-        # Check if child belongs to user's family
-        check_query = children.select().where(
-            (children.c.id == child_uuid) & 
-            (children.c.family_id == current_user['family_id'])
-        )
-        existing = await database.fetch_one(check_query)
-        if not existing:
-            raise HTTPException(status_code=404, detail="Child not found")
-        
         # Parse the date string
         dob_date = datetime.strptime(child_data.dob, '%Y-%m-%d').date()
         
-        # Update child
-        update_query = children.update().where(children.c.id == child_uuid).values(
+        # Update child only if it belongs to the user's family, and read back the updated row
+        update_query = children.update().where(
+            (children.c.id == child_uuid) & 
+            (children.c.family_id == current_user['family_id'])
+        ).values(
             first_name=child_data.first_name,
             last_name=child_data.last_name,
             dob=dob_date
-        )
-        await database.execute(update_query)
-        
-        # Fetch updated record
-        child_record = await database.fetch_one(children.select().where(children.c.id == child_uuid))
+        ).returning(children)
+        child_record = await database.fetch_one(update_query)
+        if not child_record:
+            raise HTTPException(status_code=404, detail="Child not found")
         
         return ChildResponse(
             id=uuid_to_string(child_record['id']),
@@ -110,6 +100,8 @@ async def update_child(child_id: str, child_data: ChildCreate, current_user = De
             dob=str(child_record['dob']),
             family_id=uuid_to_string(child_record['family_id'])
         )
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid child ID or date format")
     except Exception as e:
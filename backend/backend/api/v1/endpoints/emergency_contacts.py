@@ -48,11 +48,8 @@ async def create_emergency_contact(contact_data: EmergencyContactCreate, current
             relationship=contact_data.relationship,
             notes=contact_data.notes,
             created_by_user_id=current_user['id']
-        )
-        contact_id = await database.execute(insert_query)
-        
-        # Fetch the created contact
-        contact_record = await database.fetch_one(emergency_contacts.select().where(emergency_contacts.c.id == contact_id))
+        ).returning(emergency_contacts)
+        contact_record = await database.fetch_one(insert_query)
         
         return EmergencyContactResponse(
             id=contact_record['id'],
@@ -73,28 +70,20 @@ async def update_emergency_contact(contact_id: int, contact_data: EmergencyConta
     """
     Update an emergency contact that belongs to the current user's family.
     """
-    # Check if contact belongs to user's family
-    existing = await database.fetch_one(
-        emergency_contacts.select().where(
-            (emergency_contacts.c.id == contact_id) &
-            (emergency_contacts.c.family_id == current_user['family_id'])
-        )
-    )
-    if not existing:
-        raise HTTPException(status_code=404, detail="Emergency contact not found")
-    
-    # Update contact
-    update_query = emergency_contacts.update().where(emergency_contacts.c.id == contact_id).values(
+    # Update contact only if it belongs to the user's family, and read back the updated row
+    update_query = emergency_contacts.update().where(
+        (emergency_contacts.c.id == contact_id) &
+        (emergency_contacts.c.family_id == current_user['family_id'])
+    ).values(
         first_name=contact_data.first_name,
         last_name=contact_data.last_name,
         phone_number=contact_data.phone_number,
         relationship=contact_data.relationship,
         notes=contact_data.notes
-    )
-    await database.execute(update_query)
-    
-    # Fetch updated record
-    contact_record = await database.fetch_one(emergency_contacts.select().where(emergency_contacts.c.id == contact_id))
+    ).returning(emergency_contacts)
+    contact_record = await database.fetch_one(update_query)
+    if not contact_record:
+        raise HTTPException(status_code=404, detail="Emergency contact not found")
     
     return EmergencyContactResponse(
         id=contact_record['id'],
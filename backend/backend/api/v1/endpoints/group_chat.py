@@ -35,7 +35,7 @@ async def create_or_get_group_chat(chat_data: GroupChatCreate, current_user = De
     # Create new group chat identifier
     # Generate unique group identifier
     unique_string = f"{current_user['family_id']}-{chat_data.contact_type}-{chat_data.contact_id}-{time.time()}"
-    group_identifier = hashlib.md5(unique_string.encode()).hexdigest()[:16]
+    group_identifier = hashlib.sha256(unique_string.encode()).hexdigest()[:16]
     
     try:
         insert_query = group_chats.insert().values(
@@ -87,13 +87,14 @@ validate_database_config()
 # Database setup with connection pooling
 logger.info("Initializing database connection...")
 try:
-    # Configure the database with supported parameters only
+    # Options are passed straight to asyncpg.create_pool
     database = databases.Database(
         settings.DATABASE_URL,
-        min_size=2,      # Reduced minimum connections to save resources
-        max_size=10,     # Reduced maximum connections to prevent overload
-        # Note: other connection parameters like SSL, timeout, etc. are handled 
-        # at the asyncpg level through the DATABASE_URL connection string
+        min_size=settings.DB_POOL_MIN_SIZE,  # Warm connections opened at startup
+        max_size=settings.DB_POOL_MAX_SIZE,  # Upper bound before requests queue for a connection
+        max_queries=50_000,                  # Recycle connections so server-side memory doesn't creep
+        max_inactive_connection_lifetime=300,  # Close idle connections after 5 minutes
+        command_timeout=settings.DB_COMMAND_TIMEOUT,  # A stuck query can't hold a connection forever
     )
     logger.info("Database object created successfully")
 except Exception as e:
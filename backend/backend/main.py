@@ -201,12 +201,14 @@ def create_app() -> FastAPI:
     async def database_info():
         """Database connection information for debugging."""
         try:
-            # Get current connection info
+            # Current asyncpg pool usage; in_use at max_size means requests are waiting for connections
+            pool = database._backend._pool
             pool_info = {
-                "min_size": getattr(database._backend._pool, "minsize", "unknown"),
-                "max_size": getattr(database._backend._pool, "maxsize", "unknown"),
-                "size": getattr(database._backend._pool, "size", "unknown"),
-                "freesize": getattr(database._backend._pool, "freesize", "unknown"),
+                "min_size": pool.get_min_size(),
+                "max_size": pool.get_max_size(),
+                "size": pool.get_size(),
+                "idle": pool.get_idle_size(),
+                "in_use": pool.get_size() - pool.get_idle_size(),
             }
         except AttributeError:
             pool_info = {"error": "Pool information not available"}
@@ -2,6 +2,7 @@ import uuid
 from datetime import date
 import json
 import boto3
+import sqlalchemy
 from botocore.exceptions import ClientError
 from core.database import database
 from core.config import settings
@@ -9,6 +10,9 @@ from core.logging import logger
 from db.models import users, custody
 import os
 
+_sender = users.alias("sender")
+_custodian = users.alias("custodian")
+
 # Initialize SNS client
 sns_client = None
 if settings.SNS_PLATFORM_APPLICATION_ARN:
@@ -27,30 +31,29 @@ async def send_custody_change_notification(sender_id: uuid.UUID, family_id: uuid
         logger.warning("SNS client not configured. Skipping push notification.")
         return
 
-    other_user_query = users.select().where(
+    # Recipient, sender name and the day's custodian name in one query instead of four
+    other_user_query = sqlalchemy.select(
+        users.c.first_name,
+        users.c.sns_endpoint_arn,
+        _sender.c.first_name.label("sender_name"),
+        _custodian.c.first_name.label("custodian_name")
+    ).select_from(
+        users.outerjoin(_sender, _sender.c.id == sender_id)
+        .outerjoin(custody, (custody.c.family_id == family_id) & (custody.c.date == event_date))
+        .outerjoin(_custodian, _custodian.c.id == custody.c.custodian_id)
+    ).where(
         (users.c.family_id == family_id) & 
         (users.c.id != sender_id) &
         (users.c.sns_endpoint_arn.isnot(None))
-    )
+    ).limit(1)
     other_user = await database.fetch_one(other_user_query)
 
     if not other_user:
         logger.warning(f"Could not find another user in family '{family_id}' with an SNS endpoint to notify.")
         return
         
-    sender = await database.fetch_one(users.select().where(users.c.id == sender_id))
-    sender_name = sender['first_name'] if sender else "Someone"
-    
-    custodian_query = custody.select().where(
-        (custody.c.family_id == family_id) & 
-        (custody.c.date == event_date)
-    )
-    custody_record = await database.fetch_one(custodian_query)
-    
-    custodian_name = "Unknown"
-    if custody_record:
-        custodian = await database.fetch_one(users.select().where(users.c.id == custody_record['custodian_id']))
-        custodian_name = custodian['first_name'] if custodian else "Unknown"
+    sender_name = other_user['sender_name'] or "Someone"
+    custodian_name = other_user['custodian_name'] or "Unknown"
     
     formatted_date = event_date.strftime('%A, %B %-d')
     
@@ -3,6 +3,7 @@ import httpx
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional, Any, Tuple
 from bs4 import BeautifulSoup
+import lxml.html
 from urllib.parse import urljoin, urlparse
 import asyncio
 
@@ -12,6 +13,12 @@ from core.logging import logger
 SCHOOL_EVENTS_CACHE: Optional[List[Dict[str, Any]]] = None
 SCHOOL_EVENTS_CACHE_TIME: Optional[datetime] = None
 SCHOOL_EVENTS_CACHE_TTL_HOURS = 24
+# After a failed scrape, requests get the previous copy (or nothing) for a while instead of retrying in turn
+SCHOOL_EVENTS_FAILED_AT: Optional[datetime] = None
+SCHOOL_EVENTS_RETRY_MINUTES = 5
+# Only one request at a time scrapes the site; the rest wait for (or serve) the cached copy
+SCHOOL_EVENTS_LOCK = asyncio.Lock()
+CLOSINGS_HEADER_RE = re.compile(r'THE LEARNING TREE CLOSINGS IN 202[0-9]')
 
 # Calendar URL discovery patterns
 CALENDAR_URL_PATTERNS = [
@@ -339,15 +346,96 @@ async def get_school_events(family_id: str, events: List[Dict[str, str]], school
         logger.error(f"Error processing school events for family {family_id}: {e}")
         return {}
 
+def _parse_closings_html(html: str) -> Dict[str, str]:
+    """Parse the school closings page into {iso_date: event_name} with lxml."""
+    scraped_events = {}
+    tree = lxml.html.fromstring(html)
+    
+    # Find the closings header to anchor the search; it carries the year the dates below belong to
+    header = next((p for p in tree.iter('p') if CLOSINGS_HEADER_RE.search(p.text_content())), None)
+    if header is None:
+        logger.warning("Could not find the school closings header.")
+        return scraped_events
+
+    # CLOSINGS_HEADER_RE only matches a header with a year in it
+    year = re.search(r'(\d{4})', header.text_content()).group(1)
+    for sibling in header.itersiblings():
+        if not isinstance(sibling.tag, str):
+            continue  # Comments and processing instructions
+        if sibling.tag != 'p':
+            break
+        
+        # Stripped text nodes joined by spaces, as get_text(separator=' ', strip=True) did
+        text = ' '.join(chunk.strip() for chunk in sibling.itertext() if chunk.strip())
+        if not text:
+            continue
+
+        parts = text.split('-')
+        
+        if len(parts) > 1:
+            event_name = parts[0].strip()
+            date_str = "-".join(parts[1:]).strip()
+        else:
+            event_name = text
+            date_str = ""
+
+        date_match = re.search(r'(\w+\s+\d+)', text)
+        if date_match:
+            date_str = date_match.group(1)
+
+        event_year = year
+        if "new year" in event_name.lower() and "2026" in text.lower():
+            event_year = "2026"
+
+        event_name = event_name.replace(date_str, "").strip()
+        event_name = re.sub(r'\s*-\s*$', '', event_name)
+
+        try:
+            date_str_no_weekday = re.sub(r'^\w+,\s*', '', date_str)
+            full_date_str = f"{date_str_no_weekday}, {event_year}"
+            full_date_str = full_date_str.replace("Jan ", "January ")
+
+            event_date = datetime.strptime(full_date_str, '%B %d, %Y')
+            iso_date = event_date.strftime('%Y-%m-%d')
+            if event_name:
+                scraped_events[iso_date] = event_name
+        except ValueError:
+            logger.warning(f"Could not parse date from: '{date_str}' in text: '{text}'")
+
+    return scraped_events
+
+def _school_events_cache_fresh() -> bool:
+    # An empty scrape is a valid result and stays cached like any other
+    return (SCHOOL_EVENTS_CACHE is not None and
+            datetime.now(timezone.utc) - SCHOOL_EVENTS_CACHE_TIME < timedelta(hours=SCHOOL_EVENTS_CACHE_TTL_HOURS))
+
+def _school_events_retry_pending() -> bool:
+    return (SCHOOL_EVENTS_FAILED_AT is not None and
+            datetime.now(timezone.utc) - SCHOOL_EVENTS_FAILED_AT < timedelta(minutes=SCHOOL_EVENTS_RETRY_MINUTES))
+
 async def fetch_school_events() -> List[Dict[str, str]]:
     """Scrape school closing events and return list of {date, title}. Uses 24-hour in-memory cache."""
-    global SCHOOL_EVENTS_CACHE, SCHOOL_EVENTS_CACHE_TIME
-    
     # Return cached copy if fresh
-    if SCHOOL_EVENTS_CACHE and SCHOOL_EVENTS_CACHE_TIME:
-        if datetime.now(timezone.utc) - SCHOOL_EVENTS_CACHE_TIME < timedelta(hours=SCHOOL_EVENTS_CACHE_TTL_HOURS):
-            logger.info("Returning cached school events.")
+    if _school_events_cache_fresh():
+        logger.info("Returning cached school events.")
+        return SCHOOL_EVENTS_CACHE
+    # A refresh is already running; serve the stale copy instead of queueing behind it
+    if SCHOOL_EVENTS_CACHE is not None and SCHOOL_EVENTS_LOCK.locked():
+        return SCHOOL_EVENTS_CACHE
+    if _school_events_retry_pending():
+        return SCHOOL_EVENTS_CACHE or []
+
+    async with SCHOOL_EVENTS_LOCK:
+        # Another request may have refreshed the cache (or failed to) while we waited for the lock
+        if _school_events_cache_fresh():
             return SCHOOL_EVENTS_CACHE
+        if _school_events_retry_pending():
+            return SCHOOL_EVENTS_CACHE or []
+        return await _scrape_school_events()
+
+async def _scrape_school_events() -> List[Dict[str, str]]:
+    """Fetch and parse the closings page into the cache; callers hold SCHOOL_EVENTS_LOCK."""
+    global SCHOOL_EVENTS_CACHE, SCHOOL_EVENTS_CACHE_TIME, SCHOOL_EVENTS_FAILED_AT
 
     logger.info("Fetching fresh school events from the website...")
     url = "https://www.thelearningtreewilmington.com/calendar-of-events/"
@@ -358,63 +446,17 @@ async def fetch_school_events() -> List[Dict[str, str]]:
             response = await client.get(url)
             response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the header for the 2025 closings to anchor the search
-        header = soup.find('p', string=re.compile(r'THE LEARNING TREE CLOSINGS IN 2025'))
-        if header:
-            for sibling in header.find_next_siblings():
-                if sibling.name != 'p':
-                    break
-                
-                text = sibling.get_text(separator=' ', strip=True)
-                if not text:
-                    continue
-
-                parts = text.split('-')
-                
-                if len(parts) > 1:
-                    event_name = parts[0].strip()
-                    date_str = "-".join(parts[1:]).strip()
-                else:
-                    event_name = text
-                    date_str = ""
-
-                date_match = re.search(r'(\w+\s+\d+)', text)
-                if date_match:
-                    date_str = date_match.group(1)
-
-                year_match = re.search(r'(\d{4})', header.text)
-                year = year_match.group(1) if year_match else "2025"
-                
-                if "new year" in event_name.lower() and "2026" in text.lower():
-                    year = "2026"
-
-                event_name = event_name.replace(date_str, "").strip()
-                event_name = re.sub(r'\s*-\s*$', '', event_name)
-
-                try:
-                    date_str_no_weekday = re.sub(r'^\w+,\s*', '', date_str)
-                    full_date_str = f"{date_str_no_weekday}, {year}"
-                    full_date_str = full_date_str.replace("Jan ", "January ")
-
-                    event_date = datetime.strptime(full_date_str, '%B %d, %Y')
-                    iso_date = event_date.strftime('%Y-%m-%d')
-                    if event_name:
-                        scraped_events[iso_date] = event_name
-                except ValueError:
-                    logger.warning(f"Could not parse date from: '{date_str}' in text: '{text}'")
-        else:
-            logger.warning("Could not find the school closings header for 2025.")
+        # Parsing is CPU-bound, so keep it off the event loop
+        scraped_events = await asyncio.to_thread(_parse_closings_html, response.text)
 
     except Exception as e:
         logger.error(f"Failed to scrape or parse school events: {e}", exc_info=True)
+        SCHOOL_EVENTS_FAILED_AT = datetime.now(timezone.utc)
         # Return old cache if fetching fails to avoid returning nothing on a temporary error
-        if SCHOOL_EVENTS_CACHE:
-            return SCHOOL_EVENTS_CACHE
-        return []
+        return SCHOOL_EVENTS_CACHE or []
 
     logger.info(f"Successfully scraped {len(scraped_events)} school events.")
+    SCHOOL_EVENTS_FAILED_AT = None
     SCHOOL_EVENTS_CACHE = [{"date": d, "title": name} for d, name in scraped_events.items()]
     SCHOOL_EVENTS_CACHE_TIME = datetime.now(timezone.utc)
     return SCHOOL_EVENTS_CACHE
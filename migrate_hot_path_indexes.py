@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the indexes behind the hot queries in app.py.
+Custody gets a unique index (one custodian per family per day). Events get a
+partial composite index covering only non-custody rows, which is all that the
+event endpoints ever read.
+group_chats gets a unique index so create_or_get_group_chat can upsert with
+ON CONFLICT. Run this before deploying that endpoint; until the index exists
+the app falls back to SELECT-then-INSERT. Duplicate chats for the same contact
+are listed, not deleted: resolve them by hand and re-run to get the unique index
+(a plain index is created meanwhile).
+users.email must be unique-indexed for the login lookup; the index is only
+built if no unique index on the column (e.g. users_email_key) is present yet.
+users also gets a (family_id, created_at) index covering id and first_name,
+so the family custodians lookup (first two members by signup) is an
+index-only scan.
+
+Uses CONCURRENTLY so it can be run against a live database.
+"""
+
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+INDEXES = [
+    {
+        "table": "custody",
+        "name": "custody_family_date_uq",
+        "sql": """CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS custody_family_date_uq
+                 ON custody (family_id, date);""",
+        "desc": "Custody: unique family_id + date index",
+        # Falls back to a plain index if duplicate custody rows are still present
+        "fallback_name": "custody_family_date_idx",
+        "fallback_sql": """CREATE INDEX CONCURRENTLY IF NOT EXISTS custody_family_date_idx
+                          ON custody (family_id, date);""",
+        "duplicates_sql": """SELECT COUNT(*) FROM (
+                               SELECT 1 FROM custody GROUP BY family_id, date HAVING COUNT(*) > 1
+                             ) dupes;""",
+    },
+    {
+        "table": "events",
+        "name": "events_family_date_nocustody_idx",
+        "sql": """CREATE INDEX CONCURRENTLY IF NOT EXISTS events_family_date_nocustody_idx
+                 ON events (family_id, date) WHERE event_type <> 'custody';""",
+        "desc": "Events: family_id + date partial index (non-custody events)",
+    },
+    {
+        "table": "group_chats",
+        "name": "unique_group_chat_contact",
+        "sql": """CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS unique_group_chat_contact
+                 ON group_chats (family_id, contact_type, contact_id);""",
+        "desc": "Group chats: unique family_id + contact index (ON CONFLICT target)",
+        # Duplicate chats hold real conversations, so report them instead of deleting any
+        "fallback_name": "group_chats_contact_idx",
+        "fallback_sql": """CREATE INDEX CONCURRENTLY IF NOT EXISTS group_chats_contact_idx
+                          ON group_chats (family_id, contact_type, contact_id);""",
+        "duplicates_sql": """SELECT COUNT(*) FROM (
+                               SELECT 1 FROM group_chats
+                               GROUP BY family_id, contact_type, contact_id HAVING COUNT(*) > 1
+                             ) dupes;""",
+        "duplicates_report_sql": """SELECT family_id, contact_type, contact_id,
+                                           array_agg(id ORDER BY id) AS ids,
+                                           array_agg(group_identifier ORDER BY id) AS group_identifiers
+                                    FROM group_chats
+                                    GROUP BY family_id, contact_type, contact_id
+                                    HAVING COUNT(*) > 1;""",
+    },
+    {
+        "table": "users",
+        "name": "users_email_uq",
+        "sql": """CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_email_uq
+                 ON users (email);""",
+        "desc": "Users: unique email index",
+        # The model declares email unique; skip if that constraint's index already exists
+        "covered_sql": """SELECT EXISTS (
+                            SELECT 1 FROM pg_index i
+                            JOIN pg_class t ON t.oid = i.indrelid
+                            JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = i.indkey[0]
+                            WHERE t.relname = 'users' AND a.attname = 'email'
+                              AND i.indnatts = 1 AND i.indisunique AND i.indisvalid
+                          );""",
+        "fallback_name": "users_email_idx",
+        "fallback_sql": """CREATE INDEX CONCURRENTLY IF NOT EXISTS users_email_idx
+                          ON users (email);""",
+        "duplicates_sql": """SELECT COUNT(*) FROM (
+                               SELECT 1 FROM users GROUP BY email HAVING COUNT(*) > 1
+                             ) dupes;""",
+    },
+    {
+        "table": "users",
+        "name": "users_family_created_idx",
+        "sql": """CREATE INDEX CONCURRENTLY IF NOT EXISTS users_family_created_idx
+                 ON users (family_id, created_at) INCLUDE (id, first_name);""",
+        "desc": "Users: family_id + created_at index (family custodians)",
+    },
+]
+
+
+async def index_is_valid(conn, index_name):
+    """Return True if the index exists and finished building."""
+    return await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_class c
+            JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = $1 AND i.indisvalid
+        );
+    """, index_name)
+
+
+async def create_index(conn, name, sql, desc):
+    if await index_is_valid(conn, name):
+        print(f"⏭️  {desc} (already exists)")
+        return True
+
+    # A failed CONCURRENTLY build leaves an invalid index behind; drop it before retrying
+    await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+    print(f"🔨 Creating {desc}...")
+    try:
+        await conn.execute(sql)
+        print(f"✅ {desc}")
+        return True
+    except Exception as e:
+        print(f"❌ Failed to create {desc}: {e}")
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+        return False
+
+
+async def run_migration():
+    """Run the migration to add the hot-path indexes."""
+
+    # Database connection parameters
+    DB_USER = os.getenv("DB_USER")
+    DB_PASSWORD = os.getenv("DB_PASSWORD")
+    DB_HOST = os.getenv("DB_HOST")
+    DB_PORT = os.getenv("DB_PORT", "5432")
+    DB_NAME = os.getenv("DB_NAME")
+
+    if not all([DB_USER, DB_PASSWORD, DB_HOST, DB_NAME]):
+        print("❌ Database environment variables not set. Please check your .env file.")
+        return False
+
+    DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+    conn = None
+    try:
+        print("🔗 Connecting to database...")
+        conn = await asyncpg.connect(DATABASE_URL)
+
+        success = True
+        for idx in INDEXES:
+            if idx.get("covered_sql") and await conn.fetchval(idx["covered_sql"]):
+                print(f"⏭️  {idx['desc']} (covered by an existing index)")
+                continue
+            if idx.get("duplicates_sql"):
+                duplicates = await conn.fetchval(idx["duplicates_sql"])
+                if duplicates:
+                    print(f"⚠️  {duplicates} duplicate keys found for {idx['name']}; creating non-unique {idx['fallback_name']} instead")
+                    if idx.get("duplicates_report_sql"):
+                        for row in await conn.fetch(idx["duplicates_report_sql"]):
+                            print(f"    {dict(row)}")
+                    success &= await create_index(conn, idx["fallback_name"], idx["fallback_sql"], idx["desc"].replace("unique ", ""))
+                    continue
+            success &= await create_index(conn, idx["name"], idx["sql"], idx["desc"])
+
+        for table in sorted({idx["table"] for idx in INDEXES}):
+            await conn.execute(f"ANALYZE {table};")
+
+        print("🎉 Migration completed" if success else "⚠️  Migration completed with errors")
+        return success
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+    finally:
+        if conn:
+            await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_migration())
@@ -5,6 +5,8 @@ set -e
 
 APP_DIR="/var/www/cal-app"
 APP_USER="ec2-user"
+# One Uvicorn worker per core; override with WEB_CONCURRENCY
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(nproc)}"
 
 echo "--- Starting setup on the server ---"
 
@@ -55,7 +57,7 @@ User=$APP_USER
 Group=$APP_USER
 WorkingDirectory=$APP_DIR
 EnvironmentFile=$APP_DIR/.env
-ExecStart=$APP_DIR/venv/bin/gunicorn --workers 4 --worker-class uvicorn.workers.UvicornWorker app:app
+ExecStart=$APP_DIR/venv/bin/gunicorn --workers $WEB_CONCURRENCY --worker-class uvicorn.workers.UvicornWorker app:app
 
 [Install]
 WantedBy=multi-user.target